@@ -1,7 +1,8 @@
 from nuscenes.nuscenes import NuScenes
 
-NUSCENES_ROOT = "data/nuscenes"
-VERSION = "v1.0-mini"
+from src.paths import NUSCENES_ROOT, NUSCENES_VERSION
+
+VERSION = NUSCENES_VERSION
 
 nusc = NuScenes(version=VERSION, dataroot=NUSCENES_ROOT, verbose=True)
 
@@ -1,8 +1,9 @@
 import math
 from nuscenes.nuscenes import NuScenes
 
-NUSCENES_ROOT = "data/nuscenes"
-VERSION = "v1.0-mini"
+from src.paths import NUSCENES_ROOT, NUSCENES_VERSION
+
+VERSION = NUSCENES_VERSION
 
 def dist_xy(a, b):
     return math.hypot(a[0]-b[0], a[1]-b[1])
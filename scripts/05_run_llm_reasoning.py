@@ -1,9 +1,10 @@
-import json
-from pathlib import Path
 from time import perf_counter
 
-IN_PATH = Path("data/derived/driving_states_v2.jsonl")
-OUT_PATH = Path("data/derived/predictions_stub_v1.jsonl")
+from src.paths import PREDICTIONS_STUB_PATH, STATES_V2_PATH
+from src.utils.jsonio import JsonlWriter, iter_jsonl
+
+IN_PATH = STATES_V2_PATH
+OUT_PATH = PREDICTIONS_STUB_PATH
 OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
@@ -38,11 +39,8 @@ def stub_llm(state: dict) -> dict:
 def main():
     t0 = perf_counter()
     n = 0
-    with IN_PATH.open("r", encoding="utf-8") as fin, OUT_PATH.open(
-        "w", encoding="utf-8"
-    ) as fout:
-        for line in fin:
-            state = json.loads(line)
+    with JsonlWriter(OUT_PATH) as fout:
+        for state in iter_jsonl(IN_PATH):
             out = stub_llm(state)
             record = {
                 "scene": state["scene"],
@@ -60,7 +58,7 @@ def main():
                 },
                 "model_output": out,
             }
-            fout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            fout.write(record)
             n += 1
     dt = perf_counter() - t0
     print(f"✅ Wrote {n} outputs to {OUT_PATH}")
@@ -1,29 +1,23 @@
-import json
-from pathlib import Path
-from src.eval.groundedness import check_prediction
+from src.eval.groundedness_batch import check_stream
+from src.paths import PREDICTIONS_OLLAMA_PATH
+from src.utils.jsonio import iter_jsonl
 
-IN_PATH = Path("data/derived/predictions_ollama_v1.jsonl")
+IN_PATH = PREDICTIONS_OLLAMA_PATH
 
 def main():
-    n = 0
-    ok_n = 0
-    bad_examples = []
-
-    with IN_PATH.open("r", encoding="utf-8") as f:
-        for line in f:
-            record = json.loads(line)
-            ok, issues = check_prediction(record)
-            n += 1
-            if ok:
-                ok_n += 1
-            elif len(bad_examples) < 5:
-                bad_examples.append((record["scene"], record["timestamp_us"], issues))
+    res = check_stream(iter_jsonl(IN_PATH), max_samples=5)
+    n, ok_n = res.n, res.n_pass
 
     print(f"Groundedness pass rate: {ok_n}/{n} ({(ok_n/n)*100:.2f}%)")
-    if bad_examples:
+    failing = {k: v for k, v in res.failure_counts.items() if v}
+    if failing:
+        print("\nFailures per key:")
+        for k, v in sorted(failing.items(), key=lambda kv: -kv[1]):
+            print(f"  {k:28s}: {v}")
+    if res.sample_failures:
         print("\nSample failures:")
-        for scene, ts, issues in bad_examples:
+        for scene, ts, issues in res.sample_failures:
             print(f"- {scene} @ {ts}: {issues}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
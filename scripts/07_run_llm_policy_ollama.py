@@ -1,133 +1,147 @@
-import json
-import re
+import argparse
+import functools
 from pathlib import Path
-from time import perf_counter
-import requests
 
-from src.reasoning.prompt import build_policy_prompt
-from src.reasoning.guardrails import apply_guardrails
-
-IN_PATH = Path("data/derived/driving_states_v2.jsonl")
-OUT_PATH = Path("data/derived/predictions_policy_ollama_v1.jsonl")
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "qwen2.5:7b"
-
-MAX_RETRIES = 3
-TIMEOUT_S = 120
-
-
-def extract_json(text: str):
-    text = text.strip()
-    try:
-        return json.loads(text)
-    except Exception:
-        m = re.search(r"\{.*\}", text, flags=re.DOTALL)
-        if not m:
-            raise ValueError("No JSON object found.")
-        return json.loads(m.group(0))
-
-
-def call_ollama(prompt: str) -> tuple[dict, float]:
-    payload = {"model": MODEL, "prompt": prompt, "stream": False, "options": {"temperature": 0.2}}
-    t0 = perf_counter()
-    r = requests.post(OLLAMA_URL, json=payload, timeout=TIMEOUT_S)
-    dt = perf_counter() - t0
-    r.raise_for_status()
-    return r.json(), dt
+from src.eval.policy_metrics import PolicyMetrics
+from src.eval.slo_monitor import SloConfig, SloMonitor
+from src.paths import EXPLANATIONS_POLICY_PATH, PREDICTIONS_POLICY_PATH, STATES_V2_PATH
+from src.reasoning.explanation_cache import ExplanationCache, ExplanationCacheConfig
+from src.reasoning.gating import LLM_NEEDED, BackgroundExplainer, GateStats, GatingConfig, classify, gated_record
+from src.reasoning.ollama import MODEL, OLLAMA_URL, call_ollama
+from src.reasoning.policy_runner import generate_policy, prepare, state_for_llm, to_policy_record
+from src.reasoning.structured import structured_ollama, validate_policy
+from src.utils.jsonio import JsonlWriter, iter_jsonl
+
+IN_PATH = STATES_V2_PATH
+OUT_PATH = PREDICTIONS_POLICY_PATH
+EXPLAIN_PATH = EXPLANATIONS_POLICY_PATH
+
+# Used for the saved-latency estimate when every state was gated (no timed call)
+ASSUMED_LLM_LATENCY_MS = 8000.0
+
+
+def print_gate_report(gate_stats: GateStats):
+    s = gate_stats.summary(assumed_latency_ms=ASSUMED_LLM_LATENCY_MS)
+    n = s["n"]
+    print(f"\n🚦 Gating: {s['guardrail_determined']} guardrail-determined | {s['llm_needed']} LLM-needed "
+          f"| {s['explanation_only']} explanation-only")
+    print(f"🚦 LLM calls avoided: {n - s['llm_needed']}/{n} ({s['avoided_fraction']*100:.2f}%) "
+          f"| est. saved {s['saved_ms']/1000:.1f}s at {s['mean_llm_latency_ms']:.0f} ms/call")
+    print("\nPer scene (avoided %, est. saved s):")
+    for scene, sc in sorted(s["scenes"].items()):
+        print(f"  {scene}: {sc['avoided_fraction']*100:6.2f}% | {sc['saved_ms']/1000:7.1f}s "
+              f"({sc['guardrail_determined']}/{sc['llm_needed']}/{sc['explanation_only']})")
 
 
 def main():
+    ap = argparse.ArgumentParser(description="Run the LLM policy over driving states (Ollama).")
+    ap.add_argument("--model", default=MODEL, help="Ollama model name")
+    ap.add_argument("--url", default=OLLAMA_URL, help="Ollama generate endpoint")
+    ap.add_argument("--structured", action="store_true",
+                    help="constrain decoding to the policy JSON schema and validate answers")
+    ap.add_argument("--gate", action="store_true",
+                    help="skip the model when physics risk decides the action (see src/reasoning/gating.py)")
+    ap.add_argument("--gate-low-keep", action="store_true",
+                    help="with --gate: also take 'keep' at low physics risk without asking the model "
+                         "(changes decisions: the guardrails allow keep/slow_down/brake there)")
+    ap.add_argument("--no-explain", action="store_true",
+                    help="with --gate: do not generate background explanations for gated states")
+    ap.add_argument("--explain-cache", type=int, default=1024,
+                    help="with --gate: reuse rationales of equivalent states (LRU size in signatures, 0 = off)")
+    ap.add_argument("--monitor", action="store_true",
+                    help="print live throughput/latency/error stats and SLO breaches while running")
+    ap.add_argument("--slo-config", type=Path, default=None, help="JSON file with SloConfig thresholds")
+    ap.add_argument("--prom-file", type=Path, default=None, help="write Prometheus text metrics to this file")
+    ap.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on 127.0.0.1:PORT")
+    ap.add_argument("--refresh-s", type=float, default=5.0, help="live summary refresh interval (s)")
+    args = ap.parse_args()
+
+    if args.structured:
+        generate, validate = structured_ollama(args.model, url=args.url), validate_policy
+    else:
+        generate, validate = functools.partial(call_ollama, model=args.model, url=args.url), None
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    n = ok_n = override_n = 0
-
-    with IN_PATH.open("r", encoding="utf-8") as fin, OUT_PATH.open("w", encoding="utf-8") as fout:
-        for line in fin:
-            state = json.loads(line)
-
-            # minimal state exposed to LLM (structured)
-            state_for_llm = {
-                "scene": state["scene"],
-                "timestamp_us": state["timestamp_us"],
-                "ego": state.get("ego", {}),
-                "objects": state.get("objects", []),
-                "risk": state.get("risk", {}),
-                "risk_physics": state.get("risk_physics", {}),
-            }
-
-            state_risk = {
-                "risk_level_ttc": state.get("risk", {}).get("level"),
-                "min_ttc_s": state.get("risk", {}).get("min_ttc_s"),
-                "risk_level_physics": state.get("risk_physics", {}).get("level"),
-                "closest_front_object_m": state.get("risk_physics", {}).get("closest_front_object_m"),
-                "required_deceleration_mps2": state.get("risk_physics", {}).get("required_deceleration_mps2"),
-            }
-
-            prompt = build_policy_prompt(state_for_llm)
-
-            last_err = None
-            latency_s = None
-            parsed = None
-            raw = None
-
-            for _ in range(MAX_RETRIES):
-                try:
-                    resp, latency_s = call_ollama(prompt)
-                    raw = resp.get("response", "")
-                    parsed = extract_json(raw)
-                    break
-                except Exception as e:
-                    last_err = str(e)
-
-            if parsed is None:
-                record = {
-                    "scene": state["scene"],
-                    "timestamp_us": state["timestamp_us"],
-                    "state_risk": state_risk,
-                    "model": {"provider": "ollama", "name": MODEL},
-                    "latency_ms": None if latency_s is None else round(latency_s * 1000, 2),
-                    "policy": None,
-                    "final_action": "slow_down",
-                    "override_applied": True,
-                    "override_reason": "Model failure; fallback slow_down",
-                    "error": last_err,
-                }
-                fout.write(json.dumps(record, ensure_ascii=False) + "\n")
-                n += 1
-                continue
-
-            proposed = parsed.get("proposed_action")
-            final_action, override, reason = apply_guardrails(state_risk, proposed)
-
-            if override:
-                override_n += 1
-
-            record = {
-                "scene": state["scene"],
-                "timestamp_us": state["timestamp_us"],
-                "state_risk": state_risk,
-                "model": {"provider": "ollama", "name": MODEL},
-                "latency_ms": None if latency_s is None else round(latency_s * 1000, 2),
-                "policy": {
-                    "proposed_action": proposed,
-                    "rationale": parsed.get("rationale", []),
-                    "confidence": parsed.get("confidence", None),
-                },
-                "final_action": final_action,
-                "override_applied": override,
-                "override_reason": reason if override else None,
-                "raw_response_preview": None if raw is None else raw[:300],
-                "error": None,
-            }
-
-            ok_n += 1
-            fout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    gating = GatingConfig(explain_only_levels=frozenset({"low"}) if args.gate_low_keep else frozenset())
+    n = n_model = ok_n = override_n = 0
+    metrics = PolicyMetrics()
+    gate_stats = GateStats()
+    explain_out = explainer = None
+    if args.gate and not args.no_explain:
+        explain_out = JsonlWriter(EXPLAIN_PATH)
+        cache = ExplanationCache(ExplanationCacheConfig(max_signatures=args.explain_cache)) if args.explain_cache > 0 else None
+        explainer = BackgroundExplainer(generate, explain_out.write, cache=cache)
+
+    monitor = None
+    if args.monitor or args.slo_config or args.prom_file or args.metrics_port is not None:
+        monitor = SloMonitor(
+            SloConfig.from_json(args.slo_config) if args.slo_config else SloConfig(),
+            queue_depth=explainer.pending if explainer is not None else None,
+            prom_path=args.prom_file,
+            http_port=args.metrics_port,
+            refresh_s=args.refresh_s,
+        ).start()
+
+    with JsonlWriter(OUT_PATH) as fout:
+        for state in iter_jsonl(IN_PATH):
+            item = prepare(state)
+            gate, action = classify(item["state_risk"], gating) if args.gate else (LLM_NEEDED, None)
+
+            if gate == LLM_NEEDED:
+                if explainer is not None:
+                    with explainer.busy():
+                        item = generate_policy(item, generate, validate=validate)
+                else:
+                    item = generate_policy(item, generate, validate=validate)
+                record = to_policy_record(item, model_name=args.model)
+                if args.gate:
+                    record["gate"] = gate
+            else:
+                record = gated_record(item, gate, action)
+                if explainer is not None:
+                    explainer.submit(state_for_llm(state), record)
+
+            gate_stats.add(record["scene"], gate, record["latency_ms"])
+            metrics.add(record)
+            if monitor is not None:
+                monitor.add(record)
+            if gate == LLM_NEEDED:
+                n_model += 1
+                if record["policy"] is not None:
+                    ok_n += 1
+                if record["override_applied"]:
+                    override_n += 1
+
+            fout.write(record)
             n += 1
 
+    if monitor is not None:
+        monitor.close()
+        if monitor.breach_log:
+            print(f"⚠️ SLO breaches during run: {sum(e['event'] == 'breach' for e in monitor.breach_log)}")
     print(f"✅ Wrote {n} records to {OUT_PATH}")
-    print(f"✅ Parsed JSON success: {ok_n}/{n} ({(ok_n/n)*100:.2f}%)")
-    print(f"🛡️ Guardrail overrides: {override_n}/{n} ({(override_n/n)*100:.2f}%)")
+    if n_model:
+        print(f"✅ Parsed JSON success: {ok_n}/{n_model} ({(ok_n/n_model)*100:.2f}%) of model-backed records")
+        print(f"🛡️ Guardrail overrides: {override_n}/{n_model} ({(override_n/n_model)*100:.2f}%)")
+
+    h = metrics.output_health()
+    if h and h["records"]:
+        print(f"🔁 Retries: {h['retries']} | parse failures: {h['parse_failures']} "
+              f"| schema violations: {h['validation_failures']} | request failures: {h['request_failures']} "
+              f"| fallback slow_down: {h['fallback_rate']*100:.2f}% | retry latency: {h['retry_latency_ms']/1000:.1f}s")
+
+    if args.gate:
+        print_gate_report(gate_stats)
+    if explainer is not None:
+        print(f"\n⏳ Finishing {explainer.pending()} background explanations...")
+        explainer.close()
+        explain_out.close()
+        print(f"✅ Wrote {explainer.done} explanations to {EXPLAIN_PATH}")
+        if explainer.cache is not None:
+            c = explainer.cache.summary()
+            print(f"🗃️ Explanation cache: {c['hits']}/{c['lookups']} hits ({c['hit_rate']*100:.2f}%) "
+                  f"| {c['rejected_by_groundedness']} rejected by groundedness | {c['signatures']} signatures "
+                  f"| {c['evictions']} evictions")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
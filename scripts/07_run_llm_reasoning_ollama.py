@@ -1,72 +1,29 @@
-import json
-import re
-from pathlib import Path
-from time import perf_counter
-import requests
-
-from src.reasoning.prompt import build_prompt
-
-IN_PATH = Path("data/derived/driving_states_v2.jsonl")
-OUT_PATH = Path("data/derived/predictions_ollama_v1.jsonl")
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "qwen2.5:7b"
-
-MAX_RETRIES = 3
-TIMEOUT_S = 120
-
-
-def extract_json(text: str):
-    """
-    Best-effort JSON extraction:
-    - Try direct parse
-    - If extra text exists, extract first {...} block
-    """
-    text = text.strip()
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
-
-    m = re.search(r"\{.*\}", text, flags=re.DOTALL)
-    if not m:
-        raise ValueError("No JSON object found in model output.")
-    return json.loads(m.group(0))
-
-
-def call_ollama(prompt: str) -> tuple[dict, float]:
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False,
-        # You can tweak these later:
-        "options": {"temperature": 0.2},
-    }
-    t0 = perf_counter()
-    r = requests.post(OLLAMA_URL, json=payload, timeout=TIMEOUT_S)
-    dt = perf_counter() - t0
-    r.raise_for_status()
-    data = r.json()
-    return data, dt
+import argparse
+
+from src.paths import PREDICTIONS_OLLAMA_PATH, STATES_V2_PATH
+from src.reasoning.ollama import MAX_RETRIES, MODEL, OLLAMA_URL, call_ollama, extract_json
+from src.reasoning.policy_runner import state_for_llm, state_risk
+from src.reasoning.prompt import build_reasoning_prompt
+from src.utils.jsonio import JsonlWriter, iter_jsonl
+
+IN_PATH = STATES_V2_PATH
+OUT_PATH = PREDICTIONS_OLLAMA_PATH
 
 
 def main():
+    ap = argparse.ArgumentParser(description="Free-form LLM reasoning with cited evidence over driving states (Ollama).")
+    ap.add_argument("--model", default=MODEL, help="Ollama model name")
+    ap.add_argument("--url", default=OLLAMA_URL, help="Ollama generate endpoint")
+    args = ap.parse_args()
+
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
     n = 0
     ok_n = 0
-    with IN_PATH.open("r", encoding="utf-8") as fin, OUT_PATH.open("w", encoding="utf-8") as fout:
-        for line in fin:
-            state = json.loads(line)
-
-            prompt = build_prompt({
-                "scene": state["scene"],
-                "timestamp_us": state["timestamp_us"],
-                "ego": state.get("ego", {}),
-                "objects": state.get("objects", []),
-                "risk": state.get("risk", {}),
-                "risk_physics": state.get("risk_physics", {}),
-            })
+    with JsonlWriter(OUT_PATH) as fout:
+        for state in iter_jsonl(IN_PATH):
+            prompt = build_reasoning_prompt(state_for_llm(state))
+            risk = state_risk(state)
 
             last_err = None
             latency_s = None
@@ -75,20 +32,20 @@ def main():
 
             for _ in range(MAX_RETRIES):
                 try:
-                    resp, latency_s = call_ollama(prompt)
+                    resp, latency_s = call_ollama(prompt, model=args.model, url=args.url)
                     raw_text = resp.get("response", "")
                     parsed = extract_json(raw_text)
 
                     # Guardrail: force evidence to match state_risk (copy-through)
-                    if parsed is not None and isinstance(parsed, dict):
+                    if isinstance(parsed, dict):
                         ev = parsed.get("evidence", {})
                         if isinstance(ev, dict):
-                            for k, sv in record["state_risk"].items():
+                            for k, sv in risk.items():
                                 # Only overwrite keys we care about
                                 if k in ev:
                                     ev[k] = sv
                             parsed["evidence"] = ev
-                            
+
                     break
                 except Exception as e:
                     last_err = str(e)
@@ -96,14 +53,8 @@ def main():
             record = {
                 "scene": state["scene"],
                 "timestamp_us": state["timestamp_us"],
-                "state_risk": {
-                    "risk_level_ttc": state.get("risk", {}).get("level"),
-                    "min_ttc_s": state.get("risk", {}).get("min_ttc_s"),
-                    "risk_level_physics": state.get("risk_physics", {}).get("level"),
-                    "closest_front_object_m": state.get("risk_physics", {}).get("closest_front_object_m"),
-                    "required_deceleration_mps2": state.get("risk_physics", {}).get("required_deceleration_mps2"),
-                },
-                "model": {"provider": "ollama", "name": MODEL},
+                "state_risk": risk,
+                "model": {"provider": "ollama", "name": args.model},
                 "latency_ms": None if latency_s is None else round(latency_s * 1000, 2),
                 "model_output": parsed,
                 "raw_response_preview": None if raw_text is None else raw_text[:300],
@@ -113,7 +64,7 @@ def main():
             if parsed is not None:
                 ok_n += 1
 
-            fout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            fout.write(record)
             n += 1
 
     print(f"✅ Wrote {n} records to {OUT_PATH}")
@@ -121,4 +72,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
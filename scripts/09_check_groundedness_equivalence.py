@@ -0,0 +1,80 @@
+import json
+import random
+import sys
+from time import perf_counter
+
+from src.eval.groundedness import check_prediction
+from src.eval.groundedness_batch import check_batch, check_stream
+from src.paths import PREDICTIONS_OLLAMA_PATH
+
+IN_PATH = PREDICTIONS_OLLAMA_PATH
+
+
+def perturb(record: dict, rng: random.Random) -> dict:
+    # Inject the failure modes check_prediction distinguishes
+    r = json.loads(json.dumps(record))
+    out = r.setdefault("model_output", {}) or {}
+    r["model_output"] = out
+    ev = out.setdefault("evidence", {})
+    choice = rng.randrange(6)
+    if choice == 0:
+        out["action"] = "accelerate"
+    elif choice == 1 and ev:
+        k = rng.choice(list(ev))
+        ev[k] = None if ev[k] is not None else 1.0
+    elif choice == 2:
+        for k, v in ev.items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                ev[k] = v + rng.choice([0.1, 0.19, 0.25, -0.5])
+    elif choice == 3:
+        ev["risk_level_physics"] = rng.choice(["low", "medium", "high", "unknown", 3])
+    elif choice == 4:
+        ev["not_in_state"] = 42
+    return r
+
+
+def main():
+    with IN_PATH.open("r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    records = [r for r in records if r.get("model_output") is not None]
+
+    rng = random.Random(0)
+    records = records + [perturb(r, rng) for r in records for _ in range(4)]
+
+    t0 = perf_counter()
+    ref = [check_prediction(r) for r in records]
+    t_ref = perf_counter() - t0
+
+    t0 = perf_counter()
+    check_batch(records, max_samples=5)
+    t_batch = perf_counter() - t0
+
+    res = check_batch(records, max_samples=len(records))
+
+    mismatches = 0
+    sampled = iter(res.sample_failures)
+    for i, (r, (ok, issues)) in enumerate(zip(records, ref)):
+        if bool(res.pass_mask[i]) != ok:
+            mismatches += 1
+            continue
+        if not ok and next(sampled)[2] != issues:
+            mismatches += 1
+
+    # chunked streaming must add up to the same result (odd chunk size: keys and samples span chunks)
+    streamed = check_stream(iter(records), max_samples=7, chunk_records=97)
+    full = check_batch(records, max_samples=7)
+    if (not (streamed.pass_mask == full.pass_mask).all() or streamed.failure_counts != full.failure_counts
+            or streamed.sample_failures != full.sample_failures):
+        print("❌ check_stream differs from check_batch")
+        mismatches += 1
+
+    print(f"Records checked: {len(records)} | failing: {len(records) - res.n_pass}")
+    print(f"Reference: {t_ref*1000:.2f} ms | batch: {t_batch*1000:.2f} ms")
+    if mismatches:
+        print(f"❌ {mismatches} records differ from check_prediction")
+        sys.exit(1)
+    print("✅ Batch checker matches check_prediction (pass mask and issue strings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import json
+from pathlib import Path
+from time import perf_counter
+
+from src.paths import PREDICTIONS_POLICY_PATH, STATES_V2_PATH, SWEEP_CACHE_DIR, SWEEP_OUT_PATH
+from src.state.risk_physics import PhysicsRiskConfig, compute_physics_risk
+from src.state.risk_sweep import (
+    CONFIG_FIELDS, LEVELS, config_grid, inputs_from_states, physics_risk_arrays, random_configs, run_sweep,
+)
+
+STATES_PATH = STATES_V2_PATH
+POLICY_PATH = PREDICTIONS_POLICY_PATH
+CACHE_DIR = SWEEP_CACHE_DIR
+OUT_PATH = SWEEP_OUT_PATH
+
+# Grid around the defaults (PhysicsRiskConfig)
+GRID = {
+    "reaction_time_s": [0.4, 0.6, 0.8, 1.0],
+    "comfort_decel_mps2": [2.0, 2.5, 3.0, 3.5],
+    "hard_decel_mps2": [5.0, 6.0, 7.0],
+    "emergency_decel_mps2": [7.0, 8.0, 9.0],
+    "min_distance_m": [0.1],
+}
+
+# Ranges for --random
+RANGES = {
+    "reaction_time_s": (0.3, 1.2),
+    "comfort_decel_mps2": (1.5, 4.0),
+    "hard_decel_mps2": (4.5, 8.0),
+    "emergency_decel_mps2": (7.0, 10.0),
+    "min_distance_m": (0.1, 1.0),
+}
+
+
+def load_jsonl(path: Path):
+    with path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def check_against_scalar(states, inputs):
+    # The vectorized levels and emergency flags must agree with compute_physics_risk for the default config
+    cfg = PhysicsRiskConfig()
+    levels, emergency = physics_risk_arrays(inputs.ego_speed_mps, inputs.closest_front_m, cfg)
+    bad = 0
+    for i, s in enumerate(states):
+        v = s.get("ego", {}).get("speed_mps")
+        d = None if inputs.closest_front_m[i] != inputs.closest_front_m[i] else float(inputs.closest_front_m[i])
+        ref = compute_physics_risk(v, d, cfg)
+        if ref["level"] != LEVELS[levels[i]] or ref.get("emergency_decel_flag", False) != emergency[i]:
+            bad += 1
+    return bad
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep PhysicsRiskConfig over all driving states.")
+    ap.add_argument("--random", type=int, default=0, help="sample N random configs instead of the grid")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--top", type=int, default=15, help="rows to print")
+    args = ap.parse_args()
+
+    states = load_jsonl(STATES_PATH)
+    proposals = None
+    if POLICY_PATH.exists():
+        proposals = {
+            (r["scene"], r["timestamp_us"]): r["policy"]["proposed_action"]
+            for r in load_jsonl(POLICY_PATH) if r.get("policy")
+        }
+    inputs = inputs_from_states(states, proposals)
+
+    bad = check_against_scalar(states, inputs)
+    if bad:
+        print(f"⚠️ Vectorized levels/emergency flags differ from compute_physics_risk on {bad}/{inputs.n} states")
+
+    assert set(GRID) <= set(CONFIG_FIELDS)
+    configs = random_configs(args.random, RANGES, seed=args.seed) if args.random else config_grid(**GRID)
+
+    t0 = perf_counter()
+    results = run_sweep(inputs, configs, cache_dir=None if args.no_cache else CACHE_DIR, workers=args.workers)
+    dt = perf_counter() - t0
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with OUT_PATH.open("w", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+    n_cached = sum(1 for r in results if r.get("cached"))
+    print(f"✅ Swept {len(results)} configs x {inputs.n} states in {dt:.3f}s ({n_cached} from cache)")
+    print(f"✅ Wrote {OUT_PATH}")
+
+    header = "  react comf  hard  emerg mind |" + "".join(f" {lv:>8s}" for lv in LEVELS) + " |  emerg | override"
+    print("\nLevel distribution (%) per config:")
+    print(header)
+    for r in sorted(results, key=lambda r: -r["levels"]["high"])[: args.top]:
+        c = r["config"]
+        row = (f"  {c['reaction_time_s']:5.2f} {c['comfort_decel_mps2']:4.1f} {c['hard_decel_mps2']:5.1f}"
+               f" {c['emergency_decel_mps2']:5.1f} {c['min_distance_m']:4.2f} |")
+        row += "".join(f" {r['levels'][lv] / r['n'] * 100:8.2f}" for lv in LEVELS)
+        em = r["emergency_rate"]
+        row += " | " + ("   n/a" if em is None else f"{em * 100:6.2f}")
+        ov = r["override_rate"]
+        row += " | " + ("   n/a" if ov is None else f"{ov * 100:6.2f}")
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from collections import Counter
+from time import perf_counter
+
+from src.paths import DERIVED_DIR, PREDICTIONS_POLICY_PATH, STATES_V2_PATH
+from src.utils.jsonl_index import IndexedJsonl, build_index, join_states_predictions
+
+STATES_PATH = STATES_V2_PATH
+POLICY_PATH = PREDICTIONS_POLICY_PATH
+
+
+def main():
+    for path in sorted(DERIVED_DIR.glob("*.jsonl")):
+        t0 = perf_counter()
+        info = build_index(path)
+        dt = perf_counter() - t0
+        note = "" if info["indexed"] else "  (no scene/timestamp_us keys)"
+        print(f"✅ {path.name:45s} {info['indexed']:7d} keys | skipped {info['skipped']} "
+              f"| dup {info['duplicates']} | {dt*1000:.1f} ms{note}")
+
+    if not (STATES_PATH.exists() and POLICY_PATH.exists()):
+        return
+
+    # Random access
+    with IndexedJsonl(STATES_PATH) as states:
+        keys = list(states.keys())
+        t0 = perf_counter()
+        for key in reversed(keys):
+            states.get(*key)
+        dt = perf_counter() - t0
+        print(f"\n⏱️ Random fetch: {len(keys)} records in {dt*1000:.2f} ms "
+              f"({dt / max(len(keys), 1) * 1e6:.1f} us/record)")
+
+    # Join predictions with their states and cross-check the copied risk fields
+    t0 = perf_counter()
+    n = 0
+    level_pairs = Counter()
+    for _, pred, state in join_states_predictions(STATES_PATH, POLICY_PATH, how="left"):
+        n += 1
+        state_level = None if state is None else state.get("risk_physics", {}).get("level")
+        pred_level = pred.get("state_risk", {}).get("risk_level_physics")
+        level_pairs["match" if state_level == pred_level else "mismatch"] += 1
+    dt = perf_counter() - t0
+    print(f"🔗 Joined {n} predictions with states in {dt*1000:.2f} ms | physics level {dict(level_pairs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import json
+from time import perf_counter
+
+from src.eval.policy_metrics import PolicyMetrics
+from src.paths import PIPELINE_STAGE_DIR, PREDICTIONS_PIPELINE_PATH, STATES_V2_PATH
+from src.pipeline.stages import AsyncMap, JsonlSink, JsonlSource, Map, Materialize, Pipeline, Tap
+from src.reasoning.ollama import MODEL, call_ollama
+from src.reasoning.policy_runner import generate_policy, prepare, to_policy_record
+
+IN_PATH = STATES_V2_PATH
+OUT_PATH = PREDICTIONS_PIPELINE_PATH
+STAGE_DIR = PIPELINE_STAGE_DIR
+
+
+def stub_generate(item: dict):
+    # Physics-first baseline (same decision as 05_run_llm_reasoning), no model call
+    level = item["state_risk"].get("risk_level_physics")
+    action = {"high": "brake", "medium": "slow_down"}.get(level, "keep")
+    body = {"proposed_action": action, "rationale": [f"Physics risk level is {level}."], "confidence": 0.6}
+    return {"response": json.dumps(body)}, 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="States -> prompt -> LLM -> guardrails -> metrics in one process.")
+    ap.add_argument("--backend", choices=["ollama", "stub"], default="ollama")
+    ap.add_argument("--concurrency", type=int, default=1, help="parallel LLM requests")
+    ap.add_argument("--materialize", action="store_true", help=f"also write intermediate stages to {STAGE_DIR}")
+    args = ap.parse_args()
+
+    if args.backend == "stub":
+        llm = lambda item: generate_policy(item, lambda prompt: stub_generate(item))
+        model_name = provider = "stub"
+    else:
+        llm = lambda item: generate_policy(item, call_ollama)
+        model_name, provider = MODEL, "ollama"
+
+    def tee(name):
+        return Materialize(STAGE_DIR / f"{name}.jsonl") if args.materialize else None
+
+    metrics = PolicyMetrics()
+    sink = JsonlSink(OUT_PATH)
+    pipeline = Pipeline(JsonlSource(IN_PATH)).pipe(
+        Map(prepare),
+        tee("prompts"),
+        AsyncMap(llm, concurrency=args.concurrency),
+        tee("llm_outputs"),
+        Map(lambda item: to_policy_record(item, model_name=model_name, provider=provider)),
+        Tap(metrics.add),
+    )
+
+    t0 = perf_counter()
+    n = pipeline.run(sink)
+    dt = perf_counter() - t0
+
+    print(f"✅ Wrote {n} records to {OUT_PATH} in {dt:.2f}s")
+    metrics.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import itertools
+import json
+import random
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from src.reasoning.policy_runner import state_for_llm
+from src.reasoning.prompt import ALLOWED_ACTIONS, build_policy_prompt
+from src.utils import jsonio
+
+TYPES = ["vehicle", "pedestrian", "barrier", "traffic_cone", "other"]
+LEVELS = ["low", "medium", "high", "unknown"]
+
+
+def synthetic_state(rng: random.Random, i: int, n_objects: int) -> dict:
+    # Same layout as driving_states_v2.jsonl
+    objects = []
+    for _ in range(n_objects):
+        ang = round(rng.uniform(-180, 180), 1)
+        rel = round(rng.uniform(-8, 8), 2)
+        objects.append({
+            "type": rng.choice(TYPES),
+            "distance_m": round(rng.uniform(1, 60), 2),
+            "bearing_deg": ang,
+            "in_front": abs(ang) <= 35.0,
+            "rel_speed_mps": rel,
+            "ttc_s": round(rng.uniform(0.5, 20), 2) if rel < -0.1 and abs(ang) <= 35.0 else None,
+        })
+    objects.sort(key=lambda o: o["distance_m"])
+    return {
+        "dataset": "nuscenes",
+        "version": "v1.0-mini",
+        "scene": f"scene-{i // 40:04d}",
+        "timestamp_us": 1532402927647951 + i * 500_000,
+        "ego": {"speed_mps": round(rng.uniform(0, 15), 2), "yaw_deg": round(rng.uniform(-180, 180), 1)},
+        "objects": objects,
+        "risk": {"min_ttc_s": round(rng.uniform(0.5, 10), 2), "level": rng.choice(LEVELS),
+                 "reason": "TTC < 3.0s", "front_cone_deg": 35.0},
+        "risk_physics": {"closest_front_object_m": round(rng.uniform(1, 60), 2), "level": rng.choice(LEVELS),
+                         "reason": "Comfort braking sufficient"},
+    }
+
+
+def synthetic_states(n: int, n_objects: int, seed: int = 0):
+    """Lazily generated states; the same seed yields the same sequence for every consumer."""
+    rng = random.Random(seed)
+    for i in range(n):
+        yield synthetic_state(rng, i, n_objects)
+
+
+def legacy_policy_prompt(state: dict) -> str:
+    # Previous build_policy_prompt: schema and rules re-built and re-encoded on every call
+    schema = {
+        "proposed_action": f"One of {ALLOWED_ACTIONS}",
+        "rationale": [
+            "Short bullets grounded in the input state",
+            "No invented numbers or objects"
+        ],
+        "confidence": "float 0..1"
+    }
+
+    rules = f"""
+        Rules (STRICT):
+        - Decide a proposed_action based ONLY on the given state.
+        - Do NOT invent numbers, objects, or signals not present.
+        - Do NOT output evidence fields; the system will attach evidence and run safety guardrails.
+        - Output MUST be valid JSON only (no markdown, no extra text).
+        - Allowed actions: {ALLOWED_ACTIONS}
+
+        Decision objective:
+        - Maintain safety (highest priority).
+        - Avoid unnecessary braking in low-risk situations.
+        - Prefer smooth driving (slow_down over brake when sufficient).
+        - Only use brake when strong deceleration is required.
+
+        """.strip()
+
+    decision_objective = """
+        Decision objective:
+        - Maintain safety (highest priority).
+        - Avoid unnecessary braking in low-risk situations.
+        - Prefer smooth driving (slow_down over brake when sufficient).
+        - Only use brake when strong deceleration is required.
+        """.strip()
+
+    return f"""{rules}
+
+        {decision_objective}
+
+        Driving state:
+        {json.dumps(state, ensure_ascii=False)}
+
+        Return JSON with this schema:
+        {json.dumps(schema, ensure_ascii=False)}
+        """.strip()
+
+
+def timed(label, fn, n, overhead_s=0.0):
+    """Wall time of fn() minus `overhead_s` (time spent generating its input)."""
+    t0 = perf_counter()
+    fn()
+    dt = max(perf_counter() - t0 - overhead_s, 1e-9)
+    print(f"  {label:34s} {dt:8.2f}s  {n / dt:12,.0f} rec/s")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON serialization benchmark on synthetic driving states.")
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--objects", type=int, default=10, help="objects per state (real states have up to 30)")
+    ap.add_argument("--prompts", type=int, default=20_000)
+    args = ap.parse_args()
+
+    # States are generated while writing (never all in memory); each writer
+    # gets the same seeded sequence and the generation time is subtracted.
+    def states():
+        return synthetic_states(args.n, args.objects, seed=0)
+
+    print(f"Backend: {jsonio.BACKEND} | {args.n:,} states x {args.objects} objects")
+    t0 = perf_counter()
+    for _ in states():
+        pass
+    t_gen = perf_counter() - t0
+    print(f"  (generating the states takes {t_gen:.2f}s; excluded from write times)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        std_path = Path(tmp) / "std.jsonl"
+        fast_path = Path(tmp) / "fast.jsonl"
+
+        def write_std():
+            with std_path.open("w", encoding="utf-8") as f:
+                for s in states():
+                    f.write(json.dumps(s, ensure_ascii=False) + "\n")
+
+        def write_fast():
+            with jsonio.JsonlWriter(fast_path) as w:
+                for s in states():
+                    w.write(s)
+
+        def read_std():
+            with std_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    json.loads(line)
+
+        def read_fast():
+            for _ in jsonio.iter_jsonl(fast_path):
+                pass
+
+        print("\nWrite:")
+        t_ws = timed("stdlib json.dumps + write/line", write_std, args.n, t_gen)
+        t_wf = timed("jsonio.JsonlWriter", write_fast, args.n, t_gen)
+        print("\nRead:")
+        t_rs = timed("stdlib json.loads", read_std, args.n)
+        t_rf = timed("jsonio.iter_jsonl", read_fast, args.n)
+        print(f"\nFile size: stdlib {std_path.stat().st_size / 1e6:.1f} MB | jsonio {fast_path.stat().st_size / 1e6:.1f} MB")
+
+        # Round trip must be lossless
+        for a, b in zip(itertools.islice(states(), 1000), jsonio.iter_jsonl(fast_path)):
+            assert a == b
+        # ...and both writers saw the same states
+        for a, b in zip(jsonio.iter_jsonl(std_path), jsonio.iter_jsonl(fast_path)):
+            assert a == b
+
+    sample = [state_for_llm(s) for s in itertools.islice(states(), args.prompts)]
+    assert all(legacy_policy_prompt(s) == build_policy_prompt(s) for s in sample[:100])
+
+    def prompts_old():
+        for s in sample:
+            legacy_policy_prompt(s)
+
+    def prompts_new():
+        for s in sample:
+            build_policy_prompt(s)
+
+    print(f"\nPrompt build ({len(sample):,} states):")
+    t_po = timed("per-call schema + rules encoding", prompts_old, len(sample))
+    t_pn = timed("pre-encoded static parts", prompts_new, len(sample))
+
+    print(f"\nSpeedup: write x{t_ws / t_wf:.2f} | read x{t_rs / t_rf:.2f} | prompt x{t_po / t_pn:.2f}")
+
+
+if __name__ == "__main__":
+    main()
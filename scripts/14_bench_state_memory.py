@@ -0,0 +1,49 @@
+import argparse
+import gc
+import json
+import tracemalloc
+from time import perf_counter
+
+from src.paths import STATES_V2_PATH
+from src.reasoning.policy_runner import prepare, state_for_llm
+from src.state.driving_state import DrivingState
+from src.utils.jsonio import loads
+
+IN_PATH = STATES_V2_PATH
+
+
+def measure(label, build):
+    gc.collect()
+    tracemalloc.start()
+    t0 = perf_counter()
+    data = build()
+    dt = perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:22s} {current / 1e6:9.2f} MB  ({current / len(data):8.0f} B/state)  load {dt:.2f}s")
+    return data, current
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory of nested-dict states vs DrivingState.")
+    ap.add_argument("--repeat", type=int, default=50, help="replicate the state file N times")
+    args = ap.parse_args()
+
+    lines = IN_PATH.read_bytes().splitlines() * args.repeat
+    raw_mb = sum(len(l) for l in lines) / 1e6
+    print(f"{len(lines):,} states ({raw_mb:.1f} MB of JSON)")
+
+    dicts, dict_bytes = measure("nested dicts", lambda: [loads(l) for l in lines])
+    compact, compact_bytes = measure("DrivingState", lambda: [DrivingState.from_json(l) for l in lines])
+    print(f"\nReduction: x{dict_bytes / compact_bytes:.2f}")
+
+    # Round trip and views must match the dict path exactly
+    for d, s in zip(dicts[: len(dicts) // args.repeat], compact):
+        assert json.dumps(s.to_dict(), ensure_ascii=False) == json.dumps(d, ensure_ascii=False)
+        assert s.llm_json() == json.dumps(state_for_llm(d), ensure_ascii=False)
+        assert prepare(s) == prepare(d)
+    print("✅ to_dict()/JSON round trip, llm_json() and prepare() identical to the dict path")
+
+
+if __name__ == "__main__":
+    main()
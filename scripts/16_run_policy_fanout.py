@@ -0,0 +1,60 @@
+import argparse
+import json
+import zlib
+from dataclasses import replace
+from pathlib import Path
+from time import perf_counter
+
+from src.paths import FANOUT_DIR, STATES_V2_PATH
+from src.reasoning.fanout import BackendConfig, format_report, ollama_generate, run_fanout
+from src.reasoning.ollama import MODEL
+from src.reasoning.scheduler import FakeBackend
+from src.utils.jsonio import iter_jsonl
+
+IN_PATH = STATES_V2_PATH
+OUT_DIR = FANOUT_DIR
+REPORT_PATH = OUT_DIR / "fanout_report_v1.json"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Send every state to several models and compare them.")
+    ap.add_argument("--models", nargs="*", default=[MODEL], help="Ollama model names (one backend each)")
+    ap.add_argument("--concurrency", type=int, default=1, help="per-backend concurrency for --models")
+    ap.add_argument("--config", type=Path, help="JSON list of BackendConfig dicts (overrides --models)")
+    ap.add_argument("--fake", action="store_true", help="use FakeBackend (latency from options.fake_latency_s)")
+    ap.add_argument("--limit", type=int, default=None, help="only the first N states")
+    args = ap.parse_args()
+
+    if args.config:
+        backends = [BackendConfig.from_dict(d) for d in json.loads(args.config.read_text(encoding="utf-8"))]
+    else:
+        backends = [BackendConfig(name=m, model=m, concurrency=args.concurrency) for m in args.models]
+    if args.fake:
+        backends = [replace(b, provider="fake") for b in backends]
+
+    def make_generate(b: BackendConfig):
+        if args.fake:
+            return FakeBackend(latency_s=(b.options or {}).get("fake_latency_s", 0.01), seed=zlib.crc32(b.name.encode()))
+        return ollama_generate(b)
+
+    def states():
+        for i, s in enumerate(iter_jsonl(IN_PATH)):
+            if args.limit is not None and i >= args.limit:
+                return
+            yield s
+
+    t0 = perf_counter()
+    report = run_fanout(states(), backends, OUT_DIR, make_generate=make_generate)
+    dt = perf_counter() - t0
+    report["wall_time_s"] = round(dt, 3)
+
+    REPORT_PATH.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ {len(backends)} backends x {report['agreement']['n']} states in {dt:.2f}s -> {OUT_DIR}")
+    print()
+    for line in format_report(report):
+        print(line)
+    print(f"\n✅ Wrote {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
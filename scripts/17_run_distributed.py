@@ -0,0 +1,147 @@
+import argparse
+import functools
+import multiprocessing as mp
+from pathlib import Path
+
+from src.paths import DISTRIBUTED_DIR, NUSCENES_ROOT, NUSCENES_VERSION, STATES_V2_PATH
+from src.pipeline.distributed import (
+    EXPORT, POLICY, collect, export_handler, export_units, policy_handler, policy_units, run_worker,
+)
+from src.pipeline.work_queue import SqliteWorkQueue, default_worker_id
+from src.reasoning.ollama import MODEL, call_ollama
+from src.reasoning.scheduler import FakeBackend
+from src.reasoning.structured import structured_ollama, validate_policy
+
+STATES_PATH = STATES_V2_PATH
+QUEUE_DIR = DISTRIBUTED_DIR
+OUT_NAMES = {EXPORT: "driving_states_v2.jsonl", POLICY: "predictions_policy_ollama_v1.jsonl"}
+
+
+def queue_path(args) -> Path:
+    return args.queue or QUEUE_DIR / f"{args.kind}.sqlite"
+
+
+def open_queue(args) -> SqliteWorkQueue:
+    return SqliteWorkQueue(queue_path(args), max_attempts=args.max_attempts, shared=args.shared_fs)
+
+
+def cmd_enqueue(args):
+    if args.kind == EXPORT:
+        scenes = args.scenes
+        if not scenes:
+            from nuscenes.nuscenes import NuScenes
+            nusc = NuScenes(version=args.version, dataroot=args.nuscenes_root, verbose=False)
+            scenes = [s["name"] for s in nusc.scene]
+        units = export_units(scenes, args.nuscenes_root, args.version)
+    else:
+        units = policy_units(args.states)
+    with open_queue(args) as q:
+        added = q.enqueue(args.kind, units)
+        print(f"✅ Enqueued {added} new {args.kind} units ({len(units) - added} already queued) in {q.path}")
+
+
+def _handlers(args):
+    if args.kind == EXPORT:
+        return {EXPORT: export_handler()}
+    if args.backend == "fake":
+        generate, validate, model = FakeBackend(latency_s=args.fake_latency), None, "fake"
+    elif args.structured:
+        generate, validate, model = structured_ollama(args.model), validate_policy, args.model
+    else:
+        generate, validate, model = functools.partial(call_ollama, model=args.model), None, args.model
+    return {POLICY: policy_handler(generate, model, validate=validate, provider=args.backend)}
+
+
+def _worker(args, worker_id):
+    def log(lease, added, error):
+        if error is None:
+            print(f"[{worker_id}] {lease.unit_id}: +{added} rows (attempt {lease.attempt})", flush=True)
+        else:
+            print(f"[{worker_id}] {lease.unit_id}: failed (attempt {lease.attempt}): {error}", flush=True)
+
+    counts = run_worker(
+        functools.partial(open_queue, args), _handlers(args), worker_id=worker_id,
+        lease_s=args.lease_s, max_units=args.max_units, on_unit=log,
+    )
+    print(f"[{worker_id}] done: {counts}", flush=True)
+
+
+def cmd_worker(args):
+    base = args.worker_id or default_worker_id()
+    if args.processes <= 1:
+        _worker(args, base)
+        return
+    procs = [mp.Process(target=_worker, args=(args, f"{base}/{i}")) for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+def cmd_status(args):
+    with open_queue(args) as q:
+        s = q.stats()
+        print(f"{q.path}: " + " | ".join(f"{k} {v}" for k, v in s.items()))
+        for unit, attempts, err in q.failures():
+            print(f"  ✗ {unit} ({attempts} attempts): {err}")
+
+
+def cmd_retry_failed(args):
+    with open_queue(args) as q:
+        print(f"✅ Re-queued {q.retry_failed()} failed units")
+
+
+def cmd_collect(args):
+    out = args.out or QUEUE_DIR / OUT_NAMES[args.kind]
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open_queue(args) as q:
+        s = q.stats()
+        n = collect(q, out)
+    print(f"✅ Wrote {n} records to {out}")
+    if s["pending"] or s["leased"] or s["failed"]:
+        print(f"⚠️ Incomplete: {s['pending']} pending | {s['leased']} leased | {s['failed']} failed units")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shard export / LLM policy runs by scene over a shared work queue.")
+    ap.add_argument("--kind", choices=[EXPORT, POLICY], default=POLICY)
+    ap.add_argument("--queue", type=Path, default=None, help=f"queue file (default {QUEUE_DIR}/<kind>.sqlite)")
+    ap.add_argument("--max-attempts", type=int, default=3, help="attempts per unit before it is marked failed")
+    ap.add_argument("--shared-fs", action="store_true",
+                    help="queue file is shared by several hosts (network filesystem): no WAL, NTP-synced clocks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("enqueue", help="coordinator: add one unit per scene")
+    p.add_argument("--states", type=Path, default=STATES_PATH, help="policy: driving states to shard")
+    p.add_argument("--scenes", nargs="*", default=None, help="export: scene names (default: all)")
+    p.add_argument("--nuscenes-root", default=NUSCENES_ROOT)
+    p.add_argument("--version", default=NUSCENES_VERSION)
+    p.set_defaults(fn=cmd_enqueue)
+
+    p = sub.add_parser("worker", help="lease and process units until the queue is drained")
+    p.add_argument("--processes", type=int, default=1, help="worker processes on this host")
+    p.add_argument("--worker-id", default=None)
+    p.add_argument("--lease-s", type=float, default=300.0, help="lease length; renewed while a unit runs")
+    p.add_argument("--max-units", type=int, default=None)
+    p.add_argument("--backend", choices=["ollama", "fake"], default="ollama")
+    p.add_argument("--model", default=MODEL)
+    p.add_argument("--structured", action="store_true", help="constrained decoding + schema validation")
+    p.add_argument("--fake-latency", type=float, default=0.01, help="fake backend latency per call (s)")
+    p.set_defaults(fn=cmd_worker)
+
+    p = sub.add_parser("status", help="unit counts and failures")
+    p.set_defaults(fn=cmd_status)
+
+    p = sub.add_parser("retry-failed", help="give failed units another round of attempts")
+    p.set_defaults(fn=cmd_retry_failed)
+
+    p = sub.add_parser("collect", help="write collected results as one JSONL file")
+    p.add_argument("--out", type=Path, default=None)
+    p.set_defaults(fn=cmd_collect)
+
+    args = ap.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import ast
+import re
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+from src.cli import COMMANDS, script_path
+
+# Packages that should only load for the commands that need them
+HEAVY = ("nuscenes", "pyquaternion", "requests", "numpy", "orjson")
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def script_imports(path) -> str:
+    """Module-level import statements of a script (what `python script.py` loads before main())."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def time_python(code_or_args, repeat: int):
+    """(median wall ms, {top-level package: cumulative import us}, error) of a fresh interpreter."""
+    args = ["-c", code_or_args] if isinstance(code_or_args, str) else list(code_or_args)
+    walls = []
+    cumulative = {}
+    for _ in range(repeat):
+        t0 = perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True)
+        walls.append((perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            last = (proc.stderr.strip().splitlines() or ["?"])[-1]
+            return statistics.median(walls), {}, last
+    for m in _IMPORTTIME_RE.finditer(proc.stderr):
+        if m.group(3) in HEAVY:  # the package line's cumulative time covers its submodules
+            cumulative[m.group(3)] = int(m.group(2))
+    return statistics.median(walls), cumulative, None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Startup import cost per CLI command (fresh interpreter each run).")
+    ap.add_argument("--repeat", type=int, default=5, help="runs per command (median reported)")
+    ap.add_argument("--group", default=None, help="only this command group")
+    args = ap.parse_args()
+
+    base, _, _ = time_python("pass", args.repeat)
+    cli, _, _ = time_python(["-m", "src", "--help"], args.repeat)
+    print(f"Interpreter startup: {base:7.1f} ms | `python -m src --help`: {cli:7.1f} ms\n")
+
+    print(f"{'command':32s} {'wall ms':>8s} {'imports ms':>10s}  heavy modules (cumulative ms)")
+    for group, cmds in COMMANDS.items():
+        if args.group and group != args.group:
+            continue
+        for name in cmds:
+            code = script_imports(script_path(group, name))
+            wall, heavy, err = time_python(code, args.repeat)
+            label = f"{group} {name}"
+            if err is not None:
+                print(f"{label:32s} {'-':>8s} {'-':>10s}  unavailable here: {err}")
+                continue
+            heavy_s = ", ".join(f"{k} {v / 1000:.1f}" for k, v in sorted(heavy.items(), key=lambda kv: -kv[1])) or "none"
+            print(f"{label:32s} {wall:8.1f} {max(wall - base, 0.0):10.1f}  {heavy_s}")
+
+
+if __name__ == "__main__":
+    main()
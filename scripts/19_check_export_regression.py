@@ -0,0 +1,97 @@
+import argparse
+import json
+import sys
+import time
+
+from src.eval.export_regression import (
+    EXPORTERS, diff_records, format_report, load_exporter, read_golden, run_exporter, write_golden,
+)
+from src.paths import EXPORT_BENCH_PATH, EXPORT_FIXTURE_DIR, GOLDEN_DIR
+from src.state.nuscenes_fixture import FIXTURE_VERSION, TableNuScenes, write_fixture
+
+BASE_SCENES = 3  # golden files are for the scale-1 fixture
+
+
+def golden_path(fmt: str):
+    return GOLDEN_DIR / f"export_fixture_{fmt}.jsonl"
+
+
+def load_fixture(scale: int, loader: str, seed: int):
+    dataroot = EXPORT_FIXTURE_DIR / f"scale{scale}_seed{seed}"
+    write_fixture(dataroot, FIXTURE_VERSION, n_scenes=BASE_SCENES * scale, seed=seed)
+    if loader == "tables":
+        return TableNuScenes(version=FIXTURE_VERSION, dataroot=str(dataroot))
+    from nuscenes.nuscenes import NuScenes
+    return NuScenes(version=FIXTURE_VERSION, dataroot=str(dataroot), verbose=False)
+
+
+def timed(exporter, nusc, repeat: int):
+    """Fastest of `repeat` runs; each run re-exports every row."""
+    runs = [run_exporter(exporter, nusc, FIXTURE_VERSION) for _ in range(repeat)]
+    return min(runs, key=lambda r: r.seconds)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check an exporter against golden output on a synthetic nuScenes fixture.")
+    ap.add_argument("--exporter", default="v2", help=f"{' / '.join(EXPORTERS)} or module:function")
+    ap.add_argument("--format", choices=sorted(EXPORTERS), default=None,
+                    help="state format the exporter produces (default: the exporter name)")
+    ap.add_argument("--reference", default="golden",
+                    help="'golden' (checked-in output) or another exporter run on the same fixture")
+    ap.add_argument("--update-golden", action="store_true", help="rewrite the golden file from --exporter")
+    ap.add_argument("--scale", type=int, default=1, help=f"fixture scenes = {BASE_SCENES} x scale")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--loader", choices=["devkit", "tables"], default="devkit",
+                    help="nuscenes-devkit NuScenes or the dependency-free table loader")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs (best reported)")
+    ap.add_argument("--max-samples", type=int, default=10)
+    args = ap.parse_args()
+
+    fmt = args.format or (args.exporter if args.exporter in EXPORTERS else None)
+    if fmt is None and (args.reference == "golden" or args.update_golden):
+        ap.error("--format is required for a module:function exporter compared against golden output")
+    if (args.reference == "golden" or args.update_golden) and (args.scale != 1 or args.seed != 0):
+        ap.error("golden output exists for --scale 1 --seed 0 only; use --reference <exporter> at other sizes")
+
+    nusc = load_fixture(args.scale, args.loader, args.seed)
+    run = timed(load_exporter(args.exporter), nusc, args.repeat)
+    print(f"Exporter {args.exporter}: {len(run.records)} rows in {run.seconds * 1000:.1f} ms "
+          f"({run.rows_per_s:,.0f} rows/s, {args.loader} loader, {len(nusc.scene)} scenes)")
+
+    with EXPORT_BENCH_PATH.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "exporter": args.exporter,
+            "loader": args.loader,
+            "scenes": len(nusc.scene),
+            "rows": len(run.records),
+            "seconds": round(run.seconds, 6),
+            "rows_per_s": round(run.rows_per_s, 1),
+        }) + "\n")
+
+    if args.update_golden:
+        GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+        n = write_golden(golden_path(fmt), run.records)
+        print(f"✅ Wrote {n} golden rows to {golden_path(fmt)}")
+        return
+
+    if args.reference == "golden":
+        reference = read_golden(golden_path(fmt))
+        label = str(golden_path(fmt))
+    else:
+        ref_run = timed(load_exporter(args.reference), nusc, args.repeat)
+        reference = ref_run.records
+        label = args.reference
+        print(f"Reference {args.reference}: {ref_run.rows_per_s:,.0f} rows/s "
+              f"(candidate {ref_run.seconds / run.seconds:.2f}x)")
+
+    report = diff_records(reference, run.records, max_samples=args.max_samples)
+    print(format_report(report))
+    if not report.ok:
+        print(f"❌ {args.exporter} differs from {label}")
+        sys.exit(1)
+    print(f"✅ {args.exporter} matches {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.pipeline.distributed import run_worker
+from src.pipeline.work_queue import DONE, LeaseLost, SqliteWorkQueue
+
+LEASE_S = 0.3
+UNIT_S = 1.2  # each unit outlives four lease periods; only the heartbeat keeps it
+
+
+def slow_handler(payload):
+    time.sleep(UNIT_S)
+    return [{"scene": payload["scene"], "timestamp_us": 0}]
+
+
+def check_heartbeat(path: Path, shared: bool = False) -> list:
+    """Two workers, units longer than a lease: no unit may be re-leased or lost."""
+    with SqliteWorkQueue(path, shared=shared) as q:
+        q.enqueue("slow", [(f"slow:{i}", {"scene": f"scene-{i}"}) for i in range(4)])
+
+    attempts, errors, counts = [], [], []
+
+    def on_unit(lease, added, error):
+        attempts.append(lease.attempt)
+        if error is not None:
+            errors.append(f"{lease.unit_id}: {error}")
+
+    def worker(i):
+        counts.append(run_worker(
+            lambda: SqliteWorkQueue(path, shared=shared), {"slow": slow_handler}, worker_id=f"w{i}",
+            lease_s=LEASE_S, poll_s=0.05, on_unit=on_unit,
+        ))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    problems = list(errors)
+    with SqliteWorkQueue(path, shared=shared) as q:
+        s = q.stats()
+    if s[DONE] != 4 or s["results"] != 4:
+        problems.append(f"queue not drained: {s}")
+    if any(a != 1 for a in attempts) or len(attempts) != 4:
+        problems.append(f"units re-leased while their heartbeat was running: attempts {attempts}")
+    if sum(c.get("lost", 0) for c in counts):
+        problems.append(f"leases lost: {counts}")
+    return problems
+
+
+def check_heartbeat_shared(path: Path) -> list:
+    """Same, with the rollback-journal mode used for a file shared across hosts."""
+    return check_heartbeat(path, shared=True)
+
+
+def check_stale_complete(path: Path) -> list:
+    """A worker whose lease expired must not complete a unit another worker now holds."""
+    now = [0.0]
+    problems = []
+    with SqliteWorkQueue(path, clock=lambda: now[0]) as q:
+        q.enqueue("k", [("k:a", {"scene": "a"})])
+        stale = q.lease("old", lease_s=1.0)
+        now[0] = 2.0
+        fresh = q.lease("new", lease_s=1.0)
+        if fresh is None or fresh.attempt != 2:
+            return [f"expired lease not handed out again: {fresh}"]
+        try:
+            q.complete(stale, [{"scene": "a", "timestamp_us": 0, "by": "old"}])
+            problems.append("stale lease completed the unit")
+        except LeaseLost:
+            pass
+        if q.stats()["results"]:
+            problems.append("stale lease stored results")
+        if q.complete(fresh, [{"scene": "a", "timestamp_us": 0, "by": "new"}]) != 1:
+            problems.append("current lease could not complete")
+        if [r["by"] for r in q.results()] != ["new"]:
+            problems.append(f"unexpected results: {list(q.results())}")
+    return problems
+
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, check in (("heartbeat renews long units", check_heartbeat),
+                            ("heartbeat renews long units (shared=True)", check_heartbeat_shared),
+                            ("stale lease cannot complete", check_stale_complete)):
+            t0 = time.perf_counter()
+            problems = check(Path(tmp) / f"{check.__name__}.sqlite")
+            mark = "❌" if problems else "✅"
+            print(f"{mark} {name} ({time.perf_counter() - t0:.2f}s)")
+            for p in problems:
+                print(f"   {p}")
+            failed |= bool(problems)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Single entry point for the numbered scripts:
+
+    python -m src <group> <command> [script args...]
+
+Each command runs its script from scripts/ in-process. This module only
+imports the standard library, so a command pays for nuscenes / pyquaternion /
+requests / numpy only when its own script imports them; `eval` commands
+start without any of them (see `python -m src bench imports`).
+"""
+
+import runpy
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+# group -> command -> (script, help)
+COMMANDS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "inspect": {
+        "sanity": ("01_sanity_check.py", "load nuScenes and print the scene count"),
+        "first-sample": ("02_extract_basic_state.py", "objects within 30 m of the first sample of scene 0"),
+    },
+    "export": {
+        "v1": ("03_export_driving_states_v1.py", "nuScenes -> driving_states_v1"),
+        "v2": ("04_export_driving_states_v2_front_filter.py", "nuScenes -> driving_states_v2 (front filter + physics risk)"),
+    },
+    "run": {
+        "stub": ("05_run_llm_reasoning.py", "physics-first stub predictions (no model)"),
+        "reasoning": ("07_run_llm_reasoning_ollama.py", "free-form LLM reasoning with cited evidence (Ollama)"),
+        "policy": ("07_run_llm_policy_ollama.py", "LLM policy over driving states (Ollama)"),
+        "pipeline": ("12_run_policy_pipeline.py", "streaming policy pipeline with concurrent requests"),
+        "fanout": ("16_run_policy_fanout.py", "same states against several models"),
+        "distributed": ("17_run_distributed.py", "scene-sharded export / policy over a work queue"),
+        "sweep": ("10_sweep_physics_risk.py", "physics risk threshold sweep"),
+        "index": ("11_build_jsonl_index.py", "build byte-offset indexes for data/derived/*.jsonl"),
+        "simulate-scheduler": ("15_simulate_scheduler.py", "FIFO vs priority scheduling with a fake LLM"),
+    },
+    "eval": {
+        "groundedness": ("06_eval_groundedness.py", "evidence groundedness of predictions"),
+        "policy": ("08_eval_policy_metrics.py", "action/override/latency metrics of policy predictions"),
+        "groundedness-equivalence": ("09_check_groundedness_equivalence.py", "batch vs reference groundedness check"),
+        "export-regression": ("19_check_export_regression.py", "exporter vs golden output on a synthetic nuScenes fixture"),
+        "work-queue": ("20_check_work_queue.py", "lease heartbeat and stale-completion checks of the work queue"),
+    },
+    "bench": {
+        "json-io": ("13_bench_json_io.py", "JSON encode/decode and prompt building"),
+        "state-memory": ("14_bench_state_memory.py", "dict vs compact DrivingState memory"),
+        "imports": ("18_bench_import_time.py", "startup import cost of every command"),
+    },
+}
+
+
+def script_path(group: str, command: str) -> Path:
+    return SCRIPTS_DIR / COMMANDS[group][command][0]
+
+
+def usage(group: Optional[str] = None) -> str:
+    lines = ["usage: python -m src <group> <command> [args...]", ""]
+    for g, cmds in COMMANDS.items():
+        if group is not None and g != group:
+            continue
+        lines.append(f"{g}:")
+        for name, (_, help_) in cmds.items():
+            lines.append(f"  {name:26s} {help_}")
+    lines.append("")
+    lines.append("`python -m src <group> <command> --help` shows the options of commands that take any.")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    group = argv[0]
+    if group not in COMMANDS:
+        print(f"Unknown group: {group}\n\n{usage()}", file=sys.stderr)
+        return 2
+    if len(argv) < 2 or argv[1] in ("-h", "--help"):
+        print(usage(group))
+        return 0 if len(argv) >= 2 else 2
+    command = argv[1]
+    if command not in COMMANDS[group]:
+        print(f"Unknown {group} command: {command}\n\n{usage(group)}", file=sys.stderr)
+        return 2
+
+    path = script_path(group, command)
+    sys.argv = [str(path), *argv[2:]]  # the script's argparse sees only its own args
+    runpy.run_path(str(path), run_name="__main__")
+    return 0
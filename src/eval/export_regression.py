@@ -0,0 +1,206 @@
+"""
+Golden-output regression check for the driving-state exporters.
+
+An exporter is any callable that turns a loaded nuScenes (devkit NuScenes or
+TableNuScenes) into driving-state records:
+
+    fn(nusc, version) -> Iterable[record]            # whole dataset
+    fn(nusc, scene, version) -> Iterable[record]     # one scene (like scene_states)
+
+load_exporter() accepts the registered names ("v1", "v2") or "module:function",
+so a vectorized / parallel / indexed rewrite is checked by pointing the harness
+at it. diff_records() aligns rows on (scene, timestamp_us) and compares every
+field; numbers may differ by one rounding unit of the exported precision.
+"""
+
+from __future__ import annotations
+import importlib
+import inspect
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+EXPORTERS = {
+    "v1": "src.state.export_v1:scene_states",
+    "v2": "src.state.export_v2:scene_states",
+}
+
+# Exporters round metres, speeds, seconds and decelerations to 2 decimals and
+# angles to 1; a rewrite that computes the same value in another order may land
+# one rounding unit away. Matched on the field-name suffix; other numbers
+# (timestamp_us, counts) must match exactly.
+TOLERANCES: Tuple[Tuple[str, float], ...] = (
+    ("_mps2", 0.01),
+    ("_mps", 0.01),
+    ("_m", 0.01),
+    ("_s", 0.01),
+    ("_deg", 0.1),
+)
+DEFAULT_TOLERANCE = 1e-6
+_EPS = 1e-9  # float noise on top of the rounding unit
+
+Exporter = Callable[[Any, str], Iterable[Dict[str, Any]]]
+
+
+def load_exporter(spec: str) -> Exporter:
+    """Registered name or "module:function", normalised to fn(nusc, version)."""
+    target = EXPORTERS.get(spec, spec)
+    module_name, sep, attr = target.partition(":")
+    if not sep:
+        raise ValueError(f"Unknown exporter {spec!r}: use one of {sorted(EXPORTERS)} or module:function")
+    fn = getattr(importlib.import_module(module_name), attr)
+    if "scene" not in inspect.signature(fn).parameters:
+        return fn
+
+    def per_scene(nusc, version):
+        for scene in nusc.scene:
+            yield from fn(nusc, scene, version)
+
+    return per_scene
+
+
+@dataclass
+class ExportRun:
+    records: List[Dict[str, Any]]
+    seconds: float
+
+    @property
+    def rows_per_s(self) -> float:
+        return len(self.records) / self.seconds if self.seconds > 0 else float("inf")
+
+
+def run_exporter(exporter: Exporter, nusc, version: str) -> ExportRun:
+    """Runs the exporter to completion; records are compared as they would be written (JSON)."""
+    t0 = perf_counter()
+    records = list(exporter(nusc, version))
+    seconds = perf_counter() - t0
+    return ExportRun([json.loads(json.dumps(r, ensure_ascii=False)) for r in records], seconds)
+
+
+def read_golden(path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_golden(path, records: Iterable[Dict[str, Any]]) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+@dataclass
+class RegressionReport:
+    n_reference: int
+    n_candidate: int
+    missing: List[Tuple[Any, Any]] = field(default_factory=list)  # rows only in the reference
+    extra: List[Tuple[Any, Any]] = field(default_factory=list)  # rows only in the candidate
+    order_differs: bool = False
+    rows_differing: int = 0
+    field_counts: Counter = field(default_factory=Counter)  # field path -> rows where it differs
+    samples: List[Tuple[Any, str, Any, Any]] = field(default_factory=list)  # (row key, path, ref, got)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.extra or self.order_differs or self.rows_differing)
+
+
+def _row_key(r: Dict[str, Any]) -> Tuple[Any, Any]:
+    return (r.get("scene"), r.get("timestamp_us"))
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def tolerance_for(path: str, tolerances: Tuple[Tuple[str, float], ...] = TOLERANCES) -> float:
+    leaf = path.rsplit(".", 1)[-1].removesuffix("[]")
+    return next((tol for suffix, tol in tolerances if leaf.endswith(suffix)), DEFAULT_TOLERANCE)
+
+
+def _diff_value(
+    ref: Any,
+    got: Any,
+    path: str,
+    tolerances: Tuple[Tuple[str, float], ...],
+    out: List[Tuple[str, Any, Any]],
+) -> None:
+    if _is_number(ref) and _is_number(got):
+        tol = tolerance_for(path, tolerances)
+        if not (abs(ref - got) <= tol + _EPS or (math.isnan(ref) and math.isnan(got))):
+            out.append((path, ref, got))
+        return
+    if isinstance(ref, dict) and isinstance(got, dict):
+        for k in list(ref) + [k for k in got if k not in ref]:
+            sub = f"{path}.{k}" if path else k
+            if k not in got:
+                out.append((sub, ref[k], "<missing>"))
+            elif k not in ref:
+                out.append((sub, "<missing>", got[k]))
+            else:
+                _diff_value(ref[k], got[k], sub, tolerances, out)
+        return
+    if isinstance(ref, list) and isinstance(got, list):
+        if len(ref) != len(got):
+            out.append((f"{path}[len]", len(ref), len(got)))
+        for a, b in zip(ref, got):
+            _diff_value(a, b, f"{path}[]", tolerances, out)
+        return
+    if ref != got or type(ref) is not type(got):
+        out.append((path, ref, got))
+
+
+def diff_records(
+    reference: List[Dict[str, Any]],
+    candidate: List[Dict[str, Any]],
+    tolerances: Optional[Tuple[Tuple[str, float], ...]] = None,
+    max_samples: int = 10,
+) -> RegressionReport:
+    tolerances = TOLERANCES if tolerances is None else tolerances
+    report = RegressionReport(n_reference=len(reference), n_candidate=len(candidate))
+    ref_by_key = {_row_key(r): r for r in reference}
+    got_by_key = {_row_key(r): r for r in candidate}
+    report.missing = [k for k in ref_by_key if k not in got_by_key]
+    report.extra = [k for k in got_by_key if k not in ref_by_key]
+
+    shared = [k for k in ref_by_key if k in got_by_key]
+    report.order_differs = shared != [_row_key(r) for r in candidate if _row_key(r) in ref_by_key]
+
+    for key in shared:
+        diffs: List[Tuple[str, Any, Any]] = []
+        _diff_value(ref_by_key[key], got_by_key[key], "", tolerances, diffs)
+        if not diffs:
+            continue
+        report.rows_differing += 1
+        first = {}  # first difference per field path, so one list field doesn't fill the samples
+        for path, a, b in diffs:
+            first.setdefault(path, (a, b))
+        report.field_counts.update(first.keys())
+        for path, (a, b) in first.items():
+            if len(report.samples) < max_samples:
+                report.samples.append((key, path, a, b))
+    return report
+
+
+def format_report(report: RegressionReport, max_keys: int = 5) -> str:
+    lines = [f"Rows: reference {report.n_reference} | candidate {report.n_candidate} "
+             f"| differing {report.rows_differing}"]
+    if report.missing:
+        lines.append(f"Missing rows ({len(report.missing)}): {report.missing[:max_keys]}")
+    if report.extra:
+        lines.append(f"Extra rows ({len(report.extra)}): {report.extra[:max_keys]}")
+    if report.order_differs:
+        lines.append("Row order differs from the reference")
+    if report.field_counts:
+        lines.append("Fields differing (rows):")
+        for path, n in report.field_counts.most_common():
+            tol = tolerance_for(path)
+            lines.append(f"  {path:40s} {n}" + ("" if tol == DEFAULT_TOLERANCE else f"  (tolerance {tol:g})"))
+    for (scene, ts), path, a, b in report.samples:
+        lines.append(f"  {scene} @ {ts}: {path}: {a!r} -> {b!r}")
+    return "\n".join(lines)
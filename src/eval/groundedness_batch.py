@@ -0,0 +1,207 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, List, Tuple, Any, Iterable
+
+import numpy as np
+
+from src.eval.groundedness import ALLOWED_ACTIONS
+
+NUMERIC_TOLERANCE = 0.2
+CHUNK_RECORDS = 50_000  # records columnarized at a time by check_stream
+
+# Value kinds used by the columnar layout
+KIND_MISSING = 0  # key not present in the dict
+KIND_NONE = 1
+KIND_NUMBER = 2
+KIND_OTHER = 3
+
+
+@dataclass
+class EvidenceColumns:
+    """
+    Columnar view of a batch of prediction records.
+    One entry per evidence key; every array has length n_records.
+    """
+    n: int
+    scenes: List[Any]
+    timestamps: List[Any]
+    action_ok: np.ndarray  # bool
+    actions: List[Any]
+    evidence: List[Dict[str, Any]]  # kept only to order issue strings like the reference
+    keys: List[str] = field(default_factory=list)
+    pred_kind: Dict[str, np.ndarray] = field(default_factory=dict)
+    pred_num: Dict[str, np.ndarray] = field(default_factory=dict)
+    pred_obj: Dict[str, np.ndarray] = field(default_factory=dict)
+    state_kind: Dict[str, np.ndarray] = field(default_factory=dict)
+    state_num: Dict[str, np.ndarray] = field(default_factory=dict)
+    state_obj: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+@dataclass
+class BatchResult:
+    pass_mask: np.ndarray  # bool, one per record
+    failure_counts: Dict[str, int]  # "action" + one entry per evidence key
+    sample_failures: List[Tuple[Any, Any, List[str]]]
+
+    @property
+    def n(self) -> int:
+        return int(self.pass_mask.shape[0])
+
+    @property
+    def n_pass(self) -> int:
+        return int(self.pass_mask.sum())
+
+
+_MISSING = object()
+_KIND_BY_TYPE = {type(None): KIND_NONE, int: KIND_NUMBER, float: KIND_NUMBER, bool: KIND_NUMBER}
+
+
+def _kind(v: Any) -> int:
+    if v is _MISSING:
+        return KIND_MISSING
+    kind = _KIND_BY_TYPE.get(type(v))
+    if kind is None:
+        # subclasses (e.g. numpy.float64) fall back to isinstance like the reference
+        kind = KIND_NUMBER if isinstance(v, (int, float)) else KIND_OTHER
+    return kind
+
+
+def columnarize(records: Iterable[Dict[str, Any]]) -> EvidenceColumns:
+    """
+    Pack records ({"scene","timestamp_us","state_risk","model_output"}) into columns.
+    This is the only per-record Python pass; all checks run on the arrays.
+    """
+    records = list(records)
+    n = len(records)
+    outs = [r.get("model_output") or {} for r in records]
+    states = [r.get("state_risk") or {} for r in records]
+    evs = [o.get("evidence") or {} for o in outs]
+
+    keys: List[str] = []
+    seen = set()
+    for ev in evs:
+        for k in ev:
+            if k not in seen:
+                seen.add(k)
+                keys.append(k)
+
+    actions = [o.get("action") for o in outs]
+    cols = EvidenceColumns(
+        n=n,
+        scenes=[r.get("scene") for r in records],
+        timestamps=[r.get("timestamp_us") for r in records],
+        action_ok=np.fromiter((a in ALLOWED_ACTIONS for a in actions), dtype=bool, count=n),
+        actions=actions,
+        evidence=evs,
+        keys=keys,
+    )
+
+    for k in keys:
+        for src, kind_d, num_d, obj_d in (
+            (evs, cols.pred_kind, cols.pred_num, cols.pred_obj),
+            (states, cols.state_kind, cols.state_num, cols.state_obj),
+        ):
+            vals = [d.get(k, _MISSING) for d in src]
+            kind = np.fromiter(map(_kind, vals), dtype=np.int8, count=n)
+            obj = np.fromiter(vals, dtype=object, count=n)
+            num = np.full(n, np.nan)
+            is_num = kind == KIND_NUMBER
+            if is_num.any():
+                num[is_num] = obj[is_num].astype(float)
+            kind_d[k], num_d[k], obj_d[k] = kind, num, obj
+
+    return cols
+
+
+def _format_issues(cols: EvidenceColumns, i: int, fail_by_key: Dict[str, np.ndarray],
+                   numeric_by_key: Dict[str, np.ndarray]) -> List[str]:
+    # Same wording and order as check_prediction
+    issues: List[str] = []
+    if not cols.action_ok[i]:
+        issues.append(f"Invalid action: {cols.actions[i]}")
+    for k in cols.evidence[i]:
+        if not fail_by_key[k][i]:
+            continue
+        v, sv = cols.pred_obj[k][i], cols.state_obj[k][i]
+        if numeric_by_key[k][i]:
+            issues.append(f"Evidence numeric mismatch for {k}: pred={v} vs state={sv}")
+        else:
+            issues.append(f"Evidence mismatch for {k}: pred={v} vs state={sv}")
+    return issues
+
+
+def check_columns(
+    cols: EvidenceColumns,
+    tolerance: float = NUMERIC_TOLERANCE,
+    max_samples: int = 5,
+) -> BatchResult:
+    """
+    Vectorized equivalent of check_prediction over a whole batch.
+    Issue strings are only built for the first `max_samples` failing records.
+    """
+    pass_mask = cols.action_ok.copy()
+    failure_counts: Dict[str, int] = {"action": int((~cols.action_ok).sum())}
+    fail_by_key: Dict[str, np.ndarray] = {}
+    numeric_by_key: Dict[str, np.ndarray] = {}
+
+    for k in cols.keys:
+        pk, sk = cols.pred_kind[k], cols.state_kind[k]
+        # only compared when the model provided the key and the state has it
+        compared = (pk != KIND_MISSING) & (sk != KIND_MISSING)
+        p_none, s_none = pk == KIND_NONE, sk == KIND_NONE
+        none_mismatch = compared & (p_none != s_none)
+        numeric = compared & (pk == KIND_NUMBER) & (sk == KIND_NUMBER)
+        with np.errstate(invalid="ignore"):
+            num_mismatch = numeric & (np.abs(cols.pred_num[k] - cols.state_num[k]) > tolerance)
+        other = compared & ~p_none & ~s_none & ~numeric
+        other_mismatch = np.zeros(cols.n, dtype=bool)
+        if other.any():
+            other_mismatch[other] = cols.pred_obj[k][other] != cols.state_obj[k][other]
+
+        fail = none_mismatch | num_mismatch | other_mismatch
+        fail_by_key[k] = fail
+        numeric_by_key[k] = num_mismatch
+        failure_counts[k] = int(fail.sum())
+        pass_mask &= ~fail
+
+    samples = [
+        (cols.scenes[i], cols.timestamps[i], _format_issues(cols, i, fail_by_key, numeric_by_key))
+        for i in np.flatnonzero(~pass_mask)[:max_samples]
+    ]
+    return BatchResult(pass_mask=pass_mask, failure_counts=failure_counts, sample_failures=samples)
+
+
+def check_batch(
+    records: Iterable[Dict[str, Any]],
+    tolerance: float = NUMERIC_TOLERANCE,
+    max_samples: int = 5,
+) -> BatchResult:
+    return check_columns(columnarize(records), tolerance=tolerance, max_samples=max_samples)
+
+
+def check_stream(
+    records: Iterable[Dict[str, Any]],
+    tolerance: float = NUMERIC_TOLERANCE,
+    max_samples: int = 5,
+    chunk_records: int = CHUNK_RECORDS,
+) -> BatchResult:
+    """
+    check_batch over an iterator in fixed-size chunks, so memory stays bounded
+    by one chunk's columns however large the log is. Same result as check_batch.
+    """
+    it = iter(records)
+    masks: List[np.ndarray] = []
+    failure_counts: Dict[str, int] = {"action": 0}
+    samples: List[Tuple[Any, Any, List[str]]] = []
+    while True:
+        chunk = list(islice(it, chunk_records))
+        if not chunk:
+            break
+        res = check_batch(chunk, tolerance=tolerance, max_samples=max_samples - len(samples))
+        masks.append(res.pass_mask)
+        for k, v in res.failure_counts.items():
+            failure_counts[k] = failure_counts.get(k, 0) + v
+        samples.extend(res.sample_failures)
+    pass_mask = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+    return BatchResult(pass_mask=pass_mask, failure_counts=failure_counts, sample_failures=samples)
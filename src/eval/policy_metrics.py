@@ -0,0 +1,186 @@
+from __future__ import annotations
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+def percentile(xs, p):
+    if not xs:
+        return None
+    xs = sorted(xs)
+    k = (len(xs) - 1) * (p / 100.0)
+    f = math.floor(k)
+    c = math.ceil(k)
+    if f == c:
+        return xs[int(k)]
+    return xs[f] + (xs[c] - xs[f]) * (k - f)
+
+
+def is_gated(record: Dict[str, Any]) -> bool:
+    """
+    True for records decided without the model (src.reasoning.gating): they
+    have a "gate" other than llm_needed and policy None.
+    """
+    return record.get("gate") not in (None, "llm_needed")
+
+
+class PolicyMetrics:
+    """
+    Streaming accumulator for predictions_policy_* records.
+    add() one record at a time; summary()/report() at the end.
+    Gated records count towards physics and final actions only; proposed
+    actions, overrides and latency cover model-backed records.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.proposed_ctr: Counter = Counter()
+        self.final_ctr: Counter = Counter()
+        self.physics_ctr: Counter = Counter()
+        self.override_ctr: Counter = Counter()
+        self.gated_ctr: Counter = Counter()  # gate -> records decided without the model
+        self.latencies: List[float] = []
+        # Cross table: physics_level -> proposed_action counts
+        self.cross: Dict[str, Counter] = {}
+        # Output health (records written with attempt tracking)
+        self.tracked = 0
+        self.attempts = 0
+        self.failures: Counter = Counter()
+        self.fallbacks = 0
+        self.retry_latency_ms = 0.0
+
+    def add(self, r: Dict[str, Any]) -> Dict[str, Any]:
+        self.n += 1
+
+        phys = r.get("state_risk", {}).get("risk_level_physics", "unknown")
+        self.physics_ctr[phys] += 1
+
+        self.final_ctr[r.get("final_action", "none")] += 1
+        if is_gated(r):
+            self.gated_ctr[r["gate"]] += 1
+            return r
+
+        pol = r.get("policy") or {}
+        proposed = pol.get("proposed_action", "none")
+        self.proposed_ctr[proposed] += 1
+
+        override = bool(r.get("override_applied", False))
+        self.override_ctr["override" if override else "no_override"] += 1
+
+        lat = r.get("latency_ms")
+        if isinstance(lat, (int, float)):
+            self.latencies.append(lat)
+
+        self.cross.setdefault(phys, Counter())
+        self.cross[phys][proposed] += 1
+
+        if "attempts" in r:
+            self.tracked += 1
+            self.attempts += r["attempts"]
+            self.failures.update(r.get("failures") or {})
+            self.retry_latency_ms += r.get("retry_latency_ms") or 0.0
+            if r.get("policy") is None:
+                self.fallbacks += 1
+        return r
+
+    def output_health(self) -> Optional[Dict[str, Any]]:
+        """Retries, parse/validation failures and fallback slow_down rate."""
+        t = self.tracked
+        if not t:
+            return None
+        return {
+            "records": t,
+            "attempts": self.attempts,
+            "retries": self.attempts - t,
+            "request_failures": self.failures["request"],
+            "parse_failures": self.failures["parse"],
+            "validation_failures": self.failures["validation"],
+            "fallback_rate": self.fallbacks / t,
+            "retry_latency_ms": self.retry_latency_ms,
+        }
+
+    def latency_summary(self) -> Optional[Dict[str, float]]:
+        lat = self.latencies
+        if not lat:
+            return None
+        return {
+            "mean": sum(lat) / len(lat),
+            "p50": percentile(lat, 50),
+            "p90": percentile(lat, 90),
+            "p99": percentile(lat, 99),
+        }
+
+    @property
+    def n_model(self) -> int:
+        """Records whose action the model proposed (or failed to)."""
+        return self.n - sum(self.gated_ctr.values())
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.n
+        m = self.n_model
+        return {
+            "n": n,
+            "n_model": m,
+            "gated": dict(self.gated_ctr),
+            "physics": dict(self.physics_ctr),
+            "proposed": dict(self.proposed_ctr),
+            "final": dict(self.final_ctr),
+            "override_rate": self.override_ctr["override"] / m if m else None,
+            "latency_ms": self.latency_summary(),
+            "cross": {k: dict(v) for k, v in self.cross.items()},
+            "output_health": self.output_health(),
+        }
+
+    def report(self) -> None:
+        n = self.n
+        print(f"\nTotal records: {n}")
+        if not n:
+            return
+
+        print("\nPhysics risk distribution:")
+        for k, v in self.physics_ctr.most_common():
+            print(f"  {k:8s}: {v} ({v/n*100:.2f}%)")
+
+        m = self.n_model
+        if self.gated_ctr:
+            print(f"\nGated (no model call): {n - m}/{n}")
+            for k, v in self.gated_ctr.most_common():
+                print(f"  {k:18s}: {v} ({v/n*100:.2f}%)")
+
+        if m:
+            print(f"\nProposed action distribution ({m} model-backed):")
+            for k, v in self.proposed_ctr.most_common():
+                print(f"  {k:18s}: {v} ({v/m*100:.2f}%)")
+
+        print("\nFinal action distribution:")
+        for k, v in self.final_ctr.most_common():
+            print(f"  {k:18s}: {v} ({v/n*100:.2f}%)")
+
+        if m:
+            print("\nOverride rate:")
+            ov = self.override_ctr["override"]
+            print(f"  overrides: {ov}/{m} ({ov/m*100:.2f}%)")
+
+        lat = self.latency_summary()
+        if lat:
+            print("\nLatency (ms):")
+            print(f"  mean: {lat['mean']:.2f}")
+            print(f"  p50 : {lat['p50']:.2f}")
+            print(f"  p90 : {lat['p90']:.2f}")
+            print(f"  p99 : {lat['p99']:.2f}")
+
+        print("\nPhysics level -> Proposed action (counts):")
+        for phys, ctr in self.cross.items():
+            top = ", ".join([f"{a}:{c}" for a, c in ctr.most_common(5)])
+            print(f"  {phys:8s}: {top}")
+
+        h = self.output_health()
+        if h:
+            t = h["records"]
+            print("\nOutput health:")
+            print(f"  attempts/record    : {h['attempts']/t:.3f} ({h['retries']} retries)")
+            print(f"  parse failures     : {h['parse_failures']}")
+            print(f"  schema violations  : {h['validation_failures']}")
+            print(f"  request failures   : {h['request_failures']}")
+            print(f"  fallback slow_down : {h['fallback_rate']*100:.2f}%")
+            print(f"  retry latency      : {h['retry_latency_ms']/1000:.1f}s total")
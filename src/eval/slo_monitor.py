@@ -0,0 +1,306 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, TextIO, Tuple
+
+from src.eval.policy_metrics import is_gated, percentile
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+METRIC_PREFIX = "llm_policy"
+
+
+@dataclass(frozen=True)
+class SloConfig:
+    window_s: float = 60.0  # rolling window for rates and percentiles
+    # None disables a threshold
+    p50_ms: Optional[float] = None
+    p90_ms: Optional[float] = 15000.0
+    p99_ms: Optional[float] = 30000.0
+    max_error_rate: Optional[float] = 0.05  # model-backed records that fell back to slow_down
+    max_retry_rate: Optional[float] = 0.25  # retries per model-backed record
+    max_override_rate: Optional[float] = None
+    min_throughput_rps: Optional[float] = None
+    max_queue_depth: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "SloConfig":
+        known = {f.name for f in fields(cls)}
+        unknown = set(d) - known
+        if unknown:
+            raise ValueError(f"Unknown SLO fields: {sorted(unknown)}")
+        return cls(**d)
+
+    @classmethod
+    def from_json(cls, path: Path) -> "SloConfig":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# (snapshot key, SloConfig field, breached when value is "above" / "below" the threshold)
+_SLOS: Tuple[Tuple[str, str, str], ...] = (
+    ("p50_ms", "p50_ms", "above"),
+    ("p90_ms", "p90_ms", "above"),
+    ("p99_ms", "p99_ms", "above"),
+    ("error_rate", "max_error_rate", "above"),
+    ("retry_rate", "max_retry_rate", "above"),
+    ("override_rate", "max_override_rate", "above"),
+    ("throughput_rps", "min_throughput_rps", "below"),
+    ("queue_depth", "max_queue_depth", "above"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _Event:
+    t: float
+    latency_ms: Optional[float]  # None for gated records (no model call)
+    gated: bool
+    error: bool
+    retries: int
+    override: bool
+
+
+class SloMonitor:
+    """
+    Live metrics for a policy run. add() every predictions_policy_* record as it
+    is written; snapshot() gives rolling-window throughput, latency percentiles,
+    error/retry/override rates and the current queue depth.
+
+    start() launches a thread that every `refresh_s` prints a one-line summary,
+    rewrites the Prometheus text file (`prom_path`) and prints SLO breaches when
+    they start and when they clear. `http_port` additionally serves the same
+    text on http://127.0.0.1:<port>/metrics.
+    """
+
+    def __init__(
+        self,
+        cfg: SloConfig = SloConfig(),
+        queue_depth: Optional[Callable[[], int]] = None,
+        prom_path: Optional[Path] = None,
+        http_port: Optional[int] = None,
+        refresh_s: float = 5.0,
+        out: TextIO = sys.stderr,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.cfg = cfg
+        self.queue_depth = queue_depth
+        self.prom_path = None if prom_path is None else Path(prom_path)
+        self.http_port = http_port
+        self.refresh_s = refresh_s
+        self.out = out
+        self.clock = clock
+        self.started = clock()
+        self._events: Deque[_Event] = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._breached: Dict[str, float] = {}
+        self.breach_log: List[Dict[str, Any]] = []
+        # cumulative counters (Prometheus counters must not reset with the window)
+        self.total = 0
+        self.total_errors = 0
+        self.total_retries = 0
+        self.total_overrides = 0
+
+    def add(self, record: Dict[str, Any]) -> None:
+        retries = max(0, record.get("attempts", 1) - 1)
+        gated = is_gated(record)
+        ev = _Event(
+            t=self.clock(),
+            latency_ms=record.get("latency_ms"),
+            gated=gated,
+            error=record.get("policy") is None and not gated,
+            retries=retries,
+            override=bool(record.get("override_applied")),
+        )
+        with self._lock:
+            self._events.append(ev)
+            self.total += 1
+            self.total_errors += ev.error
+            self.total_retries += retries
+            self.total_overrides += ev.override
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self._lock:
+            cutoff = now - self.cfg.window_s
+            while self._events and self._events[0].t < cutoff:
+                self._events.popleft()
+            events = list(self._events)
+            totals = {
+                "requests_total": self.total,
+                "errors_total": self.total_errors,
+                "retries_total": self.total_retries,
+                "overrides_total": self.total_overrides,
+            }
+        n = len(events)
+        lat = [e.latency_ms for e in events if e.latency_ms is not None]
+        called = sum(1 for e in events if e.latency_ms is not None or e.error)
+        model = sum(1 for e in events if not e.gated)
+        span = min(self.cfg.window_s, max(now - self.started, 1e-9))
+        return {
+            "window_s": self.cfg.window_s,
+            "n": n,
+            "throughput_rps": n / span,
+            "p50_ms": percentile(lat, 50),
+            "p90_ms": percentile(lat, 90),
+            "p99_ms": percentile(lat, 99),
+            "error_rate": sum(e.error for e in events) / model if model else None,
+            "retry_rate": sum(e.retries for e in events) / called if called else None,
+            "override_rate": sum(e.override for e in events) / model if model else None,
+            "queue_depth": None if self.queue_depth is None else self.queue_depth(),
+            **totals,
+        }
+
+    def breaches(self, snap: Dict[str, Any]) -> Dict[str, Tuple[float, float]]:
+        """SLOs currently violated: {metric: (value, threshold)}."""
+        out = {}
+        for key, cfg_field, direction in _SLOS:
+            limit = getattr(self.cfg, cfg_field)
+            value = snap.get(key)
+            if limit is None or value is None:
+                continue
+            if key == "throughput_rps" and snap["n"] == 0:
+                continue  # nothing finished yet; not a throughput signal
+            if (value > limit) if direction == "above" else (value < limit):
+                out[key] = (value, limit)
+        return out
+
+    def refresh(self) -> Dict[str, Any]:
+        """One tick: summary line, breach transitions, Prometheus file."""
+        snap = self.snapshot()
+        current = self.breaches(snap)
+        for key, (value, limit) in current.items():
+            if key not in self._breached:
+                self._log_breach("breach", key, value, limit)
+        for key in list(self._breached):
+            if key not in current:
+                self._log_breach("recovered", key, snap.get(key), getattr(self.cfg, _field_for(key)))
+        self._breached = {k: v for k, (v, _) in current.items()}
+        snap["slo_breaches"] = sorted(current)
+
+        print(format_status(snap), file=self.out, flush=True)
+        if self.prom_path is not None:
+            tmp = self.prom_path.with_suffix(self.prom_path.suffix + ".tmp")
+            tmp.write_text(self.prometheus_text(snap), encoding="utf-8")
+            os.replace(tmp, self.prom_path)  # scrapers never see a half-written file
+        return snap
+
+    def _log_breach(self, kind: str, key: str, value: Optional[float], limit: float) -> None:
+        entry = {"t_s": round(self.clock() - self.started, 3), "event": kind, "slo": key,
+                 "value": value, "threshold": limit}
+        self.breach_log.append(entry)
+        mark = "⚠️ SLO breach" if kind == "breach" else "✅ SLO recovered"
+        shown = "-" if value is None else f"{value:.3f}"
+        print(f"{mark}: {key}={shown} (threshold {limit})", file=self.out, flush=True)
+
+    def prometheus_text(self, snap: Optional[Dict[str, Any]] = None) -> str:
+        snap = self.snapshot() if snap is None else snap
+        breached = set(snap.get("slo_breaches", self._breached))
+        p = METRIC_PREFIX
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_: str, samples: List[Tuple[str, Any]]) -> None:
+            lines.append(f"# HELP {p}_{name} {help_}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{p}_{name}{labels} {'NaN' if value is None else value}")
+
+        metric("requests_total", "counter", "Policy records produced.", [("", snap["requests_total"])])
+        metric("errors_total", "counter", "Records that fell back to slow_down.", [("", snap["errors_total"])])
+        metric("retries_total", "counter", "Model retries.", [("", snap["retries_total"])])
+        metric("overrides_total", "counter", "Guardrail overrides.", [("", snap["overrides_total"])])
+        metric("latency_ms", "summary", f"Model latency over the last {snap['window_s']:g}s.",
+               [(f'{{quantile="{q}"}}', snap[k]) for q, k in (("0.5", "p50_ms"), ("0.9", "p90_ms"), ("0.99", "p99_ms"))])
+        for key, help_ in (
+            ("throughput_rps", "Records per second over the window."),
+            ("error_rate", "Fallback rate of model-backed records over the window."),
+            ("retry_rate", "Retries per model-backed record over the window."),
+            ("override_rate", "Guardrail override rate of model-backed records over the window."),
+            ("queue_depth", "Requests waiting for the backend."),
+        ):
+            metric(key, "gauge", help_, [("", snap[key])])
+        metric("slo_breach", "gauge", "1 while the SLO is violated.",
+               [(f'{{slo="{key}"}}', int(key in breached))
+                for key, cfg_field, _ in _SLOS if getattr(self.cfg, cfg_field) is not None])
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> "SloMonitor":
+        if self.http_port is not None:
+            from http.server import ThreadingHTTPServer  # ~40 ms import; only when serving
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.http_port), _handler(self))
+            threading.Thread(target=self._server.serve_forever, name="slo-http", daemon=True).start()
+        self._thread = threading.Thread(target=self._run, name="slo-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_s):
+            self.refresh()
+
+    def close(self) -> Dict[str, Any]:
+        """Stop the refresher and return the final snapshot."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        snap = self.refresh()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        return snap
+
+    def __enter__(self) -> "SloMonitor":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _field_for(key: str) -> str:
+    return next(cfg_field for k, cfg_field, _ in _SLOS if k == key)
+
+
+def _handler(monitor: SloMonitor):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = monitor.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # keep the terminal summary readable
+
+    return Handler
+
+
+def format_status(snap: Dict[str, Any]) -> str:
+    def ms(v):
+        return "-" if v is None else f"{v:.0f}"
+
+    def pct(v):
+        return "-" if v is None else f"{v * 100:.1f}%"
+
+    q = snap.get("queue_depth")
+    line = (f"📈 [{snap['window_s']:g}s] n={snap['n']} {snap['throughput_rps']:.2f}/s "
+            f"| p50 {ms(snap['p50_ms'])} p90 {ms(snap['p90_ms'])} p99 {ms(snap['p99_ms'])} ms "
+            f"| err {pct(snap['error_rate'])} retry {pct(snap['retry_rate'])} override {pct(snap['override_rate'])} "
+            f"| queue {'-' if q is None else q} | total {snap['requests_total']}")
+    if snap.get("slo_breaches"):
+        line += f" | SLO ✗ {','.join(snap['slo_breaches'])}"
+    return line
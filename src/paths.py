@@ -0,0 +1,31 @@
+"""
+Dataset locations and artifact paths shared by the scripts and the CLI.
+Paths are relative to the repository root (where every command is run from).
+"""
+
+from pathlib import Path
+
+NUSCENES_ROOT = "data/nuscenes"
+NUSCENES_VERSION = "v1.0-mini"
+
+DERIVED_DIR = Path("data/derived")
+
+STATES_V1_PATH = DERIVED_DIR / "driving_states_v1.jsonl"
+STATES_V2_PATH = DERIVED_DIR / "driving_states_v2.jsonl"
+
+PREDICTIONS_STUB_PATH = DERIVED_DIR / "predictions_stub_v1.jsonl"
+PREDICTIONS_OLLAMA_PATH = DERIVED_DIR / "predictions_ollama_v1.jsonl"
+PREDICTIONS_POLICY_PATH = DERIVED_DIR / "predictions_policy_ollama_v1.jsonl"
+EXPLANATIONS_POLICY_PATH = DERIVED_DIR / "explanations_policy_ollama_v1.jsonl"
+PREDICTIONS_PIPELINE_PATH = DERIVED_DIR / "predictions_policy_pipeline_v1.jsonl"
+
+PIPELINE_STAGE_DIR = DERIVED_DIR / "pipeline_stages"
+SWEEP_CACHE_DIR = DERIVED_DIR / "sweep_cache"
+SWEEP_OUT_PATH = DERIVED_DIR / "physics_risk_sweep_v1.jsonl"
+FANOUT_DIR = DERIVED_DIR / "fanout"
+DISTRIBUTED_DIR = DERIVED_DIR / "distributed"
+
+# Synthetic nuScenes tables + golden exporter output for the export regression check
+EXPORT_FIXTURE_DIR = DERIVED_DIR / "export_fixture"
+EXPORT_BENCH_PATH = DERIVED_DIR / "export_regression_bench.jsonl"
+GOLDEN_DIR = Path("data/golden")
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.pipeline.work_queue import LEASED, Lease, LeaseLost, WorkQueue, default_worker_id
+from src.reasoning.policy_runner import Generate, run_policy
+from src.utils.jsonio import JsonlWriter
+from src.utils.jsonl_index import IndexedJsonl
+
+EXPORT = "export"
+POLICY = "policy"
+
+# kind -> handler(payload) -> result records (each with scene + timestamp_us)
+Handler = Callable[[Dict[str, Any]], Iterable[Dict[str, Any]]]
+
+
+def unit_id(kind: str, scene: str) -> str:
+    return f"{kind}:{scene}"
+
+
+def export_units(scenes: Iterable[str], nuscenes_root: str, version: str) -> List[tuple]:
+    return [(unit_id(EXPORT, s), {"scene": s, "dataroot": nuscenes_root, "version": version}) for s in scenes]
+
+
+def policy_units(states_path: Path) -> List[tuple]:
+    """One unit per scene of a driving_states file (scene order taken from its index)."""
+    with IndexedJsonl(states_path) as idx:
+        scenes = list(dict.fromkeys(scene for scene, _ in idx.keys()))
+    return [(unit_id(POLICY, s), {"scene": s, "states_path": str(states_path)}) for s in scenes]
+
+
+def export_handler() -> Handler:
+    """Exports one scene with the 04 logic; the NuScenes db is loaded once per worker."""
+    cache: Dict[tuple, Any] = {}
+
+    def handle(payload: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        from nuscenes.nuscenes import NuScenes
+        from src.state.export_v2 import scene_by_name, scene_states
+
+        key = (payload["dataroot"], payload["version"])
+        if key not in cache:
+            cache[key] = NuScenes(version=payload["version"], dataroot=payload["dataroot"], verbose=False)
+        nusc = cache[key]
+        return list(scene_states(nusc, scene_by_name(nusc, payload["scene"]), version=payload["version"]))
+
+    return handle
+
+
+def policy_handler(generate: Generate, model_name: str, validate=None, provider: str = "ollama") -> Handler:
+    """
+    Runs the 07 policy (prompt -> model -> guardrails) over every state of one scene.
+    The states index is opened and grouped by scene once per worker.
+    """
+    cache: Dict[str, tuple] = {}
+
+    def handle(payload: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        path = payload["states_path"]
+        if path not in cache:
+            idx = IndexedJsonl(Path(path))
+            by_scene: Dict[str, List[tuple]] = {}
+            for k in idx.keys():
+                by_scene.setdefault(k[0], []).append(k)
+            cache[path] = (idx, by_scene)
+        idx, by_scene = cache[path]
+        return [
+            run_policy(idx.get(*k), generate, model_name=model_name, validate=validate, provider=provider)
+            for k in by_scene.get(payload["scene"], [])
+        ]
+
+    return handle
+
+
+class _Heartbeat:
+    """
+    Renews a lease every lease_s / 3 while a unit is being processed. The
+    queue is opened on the heartbeat thread itself (SQLite connections can
+    only be used by the thread that opened them).
+    """
+
+    def __init__(self, open_queue: Callable[[], WorkQueue], lease: Lease, lease_s: float):
+        self._open_queue = open_queue
+        self._lease = lease
+        self._lease_s = lease_s
+        self._stop = threading.Event()
+        self.lost = False
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        queue = self._open_queue()
+        try:
+            while not self._stop.wait(self._lease_s / 3):
+                if not queue.renew(self._lease, self._lease_s):
+                    self.lost = True  # someone else owns the unit now; complete() will be rejected
+                    return
+        finally:
+            _close(queue)
+
+
+def _close(queue: WorkQueue) -> None:
+    close = getattr(queue, "close", None)
+    if close is not None:
+        close()
+
+
+def run_worker(
+    open_queue: Callable[[], WorkQueue],
+    handlers: Dict[str, Handler],
+    worker_id: Optional[str] = None,
+    lease_s: float = 300.0,
+    max_units: Optional[int] = None,
+    poll_s: Optional[float] = 5.0,
+    on_unit: Optional[Callable[[Lease, Optional[int], Optional[str]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Lease and process units until the queue has nothing left to hand out.
+    A handler exception releases the unit for a retry (up to the queue's max_attempts).
+    While other workers still hold leases the worker polls every `poll_s`, so
+    units of a crashed worker are picked up once their lease expires
+    (poll_s=None: exit as soon as nothing is pending).
+    A unit whose lease was lost mid-run (expired and re-leased elsewhere) is
+    counted as "lost" and its results are discarded.
+    `open_queue` is called once per worker and once per unit for the
+    heartbeat thread (SQLite connections are per thread).
+    on_unit(lease, rows_added, error) is called after each unit.
+    """
+    worker_id = worker_id or default_worker_id()
+    queue = open_queue()
+    counts = {"done": 0, "errors": 0, "lost": 0, "rows": 0}
+    try:
+        while max_units is None or counts["done"] + counts["errors"] + counts["lost"] < max_units:
+            lease = queue.lease(worker_id, lease_s)
+            if lease is None:
+                if poll_s is not None and queue.stats()[LEASED]:
+                    time.sleep(poll_s)
+                    continue
+                break
+            handler = handlers.get(lease.kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for unit kind {lease.kind!r}")
+                with _Heartbeat(open_queue, lease, lease_s):
+                    records = list(handler(lease.payload))
+            except Exception as e:
+                queue.fail(lease, f"{type(e).__name__}: {e}")
+                counts["errors"] += 1
+                if on_unit is not None:
+                    on_unit(lease, None, str(e))
+                continue
+            try:
+                added = queue.complete(lease, records)
+            except LeaseLost as e:
+                counts["lost"] += 1
+                if on_unit is not None:
+                    on_unit(lease, None, str(e))
+                continue
+            counts["done"] += 1
+            counts["rows"] += added
+            if on_unit is not None:
+                on_unit(lease, added, None)
+    finally:
+        _close(queue)
+    return counts
+
+
+def collect(queue: WorkQueue, out_path: Path) -> int:
+    """
+    Write all stored results to one JSONL file (enqueue order, then timestamp).
+    Lines are copied as stored, so exports match the single-process 04 output.
+    """
+    with JsonlWriter(out_path) as w:
+        for line in queue.result_lines():
+            w.write_raw(line.encode("utf-8"))
+        return w.n
@@ -0,0 +1,193 @@
+"""
+Lazy, pull-based pipeline stages.
+
+Every stage is a callable `Iterable -> Iterator`; nothing runs until a sink
+pulls from the end of the chain, and each stage only asks upstream for the
+next item when it needs one. That gives backpressure for free: a slow LLM
+stage simply stops pulling states from the source.
+
+    metrics = PolicyMetrics()
+    Pipeline(JsonlSource(STATES)).pipe(
+        Map(prepare),
+        AsyncMap(lambda it: generate_policy(it, call_ollama), concurrency=2),
+        Map(to_policy_record),
+        Materialize(OUT_PATH),
+        Tap(metrics.add),
+    ).run()
+"""
+
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from src.utils.jsonio import JsonlWriter, dumps_bytes, loads as json_loads
+
+Stage = Callable[[Iterable[Any]], Iterator[Any]]
+
+
+# --- Sources ---
+
+class JsonlSource:
+    """Yields one parsed record per non-empty line; re-iterable."""
+
+    def __init__(self, path: Path, loads: Callable[[bytes], Any] = json_loads):
+        self.path = Path(path)
+        self.loads = loads
+
+    def __iter__(self) -> Iterator[Any]:
+        with self.path.open("rb") as f:
+            for line in f:
+                if line.strip():
+                    yield self.loads(line)
+
+
+# --- Transforms ---
+
+class Map:
+    def __init__(self, fn: Callable[[Any], Any]):
+        self.fn = fn
+
+    def __call__(self, items: Iterable[Any]) -> Iterator[Any]:
+        fn = self.fn
+        for item in items:
+            yield fn(item)
+
+
+class Filter:
+    def __init__(self, pred: Callable[[Any], bool]):
+        self.pred = pred
+
+    def __call__(self, items: Iterable[Any]) -> Iterator[Any]:
+        pred = self.pred
+        for item in items:
+            if pred(item):
+                yield item
+
+
+class Tap:
+    """Calls fn(item) for its side effect (metrics, logging) and passes the item through."""
+
+    def __init__(self, fn: Callable[[Any], Any]):
+        self.fn = fn
+
+    def __call__(self, items: Iterable[Any]) -> Iterator[Any]:
+        fn = self.fn
+        for item in items:
+            fn(item)
+            yield item
+
+
+class Batch:
+    """Groups items into lists of `size` (last batch may be shorter)."""
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError("Batch size must be >= 1")
+        self.size = size
+
+    def __call__(self, items: Iterable[Any]) -> Iterator[List[Any]]:
+        buf: List[Any] = []
+        for item in items:
+            buf.append(item)
+            if len(buf) >= self.size:
+                yield buf
+                buf = []
+        if buf:
+            yield buf
+
+
+class Unbatch:
+    def __call__(self, batches: Iterable[Iterable[Any]]) -> Iterator[Any]:
+        for batch in batches:
+            yield from batch
+
+
+class AsyncMap:
+    """
+    Order-preserving concurrent map on a thread pool (LLM calls are blocking I/O).
+    At most `max_pending` items are in flight or finished-but-not-consumed;
+    upstream is not pulled again until the oldest one has been handed downstream.
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], concurrency: int = 4, max_pending: Optional[int] = None):
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max_pending or 2 * self.concurrency
+
+    def __call__(self, items: Iterable[Any]) -> Iterator[Any]:
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as ex:
+            for item in items:
+                pending.append(ex.submit(self.fn, item))
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+class Materialize:
+    """
+    Pass-through stage that also writes each item to a JSONL file,
+    for when an intermediate artifact is wanted on disk.
+    """
+
+    def __init__(self, path: Path, dumps: Callable[[Any], bytes] = dumps_bytes):
+        self.path = Path(path)
+        self.dumps = dumps
+        self.n = 0
+
+    def __call__(self, items: Iterable[Any]) -> Iterator[Any]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with JsonlWriter(self.path) as w:
+            for item in items:
+                w.write_raw(self.dumps(item))
+                self.n += 1
+                yield item
+
+
+# --- Sinks ---
+
+class JsonlSink(Materialize):
+    """Terminal Materialize: pass to Pipeline.run(); returns the record count."""
+
+    def consume(self, items: Iterable[Any]) -> int:
+        for _ in self(items):
+            pass
+        return self.n
+
+
+class CollectSink:
+    def consume(self, items: Iterable[Any]) -> List[Any]:
+        return list(items)
+
+
+class DrainSink:
+    """Pulls everything through the pipeline and returns the item count."""
+
+    def consume(self, items: Iterable[Any]) -> int:
+        n = 0
+        for _ in items:
+            n += 1
+        return n
+
+
+class Pipeline:
+    def __init__(self, source: Iterable[Any], stages: Iterable[Stage] = ()):
+        self.source = source
+        self.stages: List[Stage] = list(stages)
+
+    def pipe(self, *stages: Optional[Stage]) -> "Pipeline":
+        """Returns a new pipeline with `stages` appended; None entries are skipped (optional stages)."""
+        return Pipeline(self.source, self.stages + [s for s in stages if s is not None])
+
+    def __iter__(self) -> Iterator[Any]:
+        it: Iterable[Any] = self.source
+        for stage in self.stages:
+            it = stage(it)
+        return iter(it)
+
+    def run(self, sink: Optional[Any] = None) -> Any:
+        return (sink or DrainSink()).consume(iter(self))
+
@@ -0,0 +1,278 @@
+"""
+Lease-based work queue for sharding runs across processes or machines.
+
+A coordinator enqueues work units (one per scene); workers lease a unit,
+process it and complete it with its result records. A lease that is not
+completed or renewed before it expires goes back to the queue, so a crashed
+worker's scene is picked up again. Only the current lease holder can complete
+a unit: a worker whose lease expired gets LeaseLost and its results are
+dropped. Results are keyed by (scene, timestamp_us), so rows are never
+duplicated.
+
+SqliteWorkQueue is the default broker: one file that every worker opens.
+By default it runs in WAL mode, which needs shared memory and so only works
+for workers on one host. For workers on several hosts sharing the file over
+a network filesystem, open it with shared=True (rollback journal + file
+locks; the filesystem must support POSIX locks) and keep host clocks in sync
+(NTP): lease expiry is read from the SQLite clock of whichever host checks
+it, so skew beyond two thirds of lease_s re-leases running units. A stale
+worker still cannot complete such a unit (LeaseLost), so skew costs repeated
+work, never duplicate rows. Anything implementing the WorkQueue protocol
+(e.g. a server-backed queue for hosts without a shared filesystem) can
+replace it.
+"""
+
+from __future__ import annotations
+import json
+import os
+import socket
+import sqlite3
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Protocol, Tuple
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (PENDING, LEASED, DONE, FAILED)
+
+
+@dataclass(frozen=True)
+class Lease:
+    unit_id: str
+    kind: str
+    payload: Dict[str, Any]
+    attempt: int
+    token: str  # identifies this lease; stale tokens cannot renew or fail the unit
+
+
+class LeaseLost(Exception):
+    """The lease expired and the unit was handed to another worker (or finished)."""
+
+
+class WorkQueue(Protocol):
+    def enqueue(self, kind: str, units: Iterable[Tuple[str, Dict[str, Any]]]) -> int: ...
+    def lease(self, worker_id: str, lease_s: float) -> Optional[Lease]: ...
+    def renew(self, lease: Lease, lease_s: float) -> bool: ...
+    def complete(self, lease: Lease, records: Iterable[Dict[str, Any]]) -> int: ...
+    def fail(self, lease: Lease, error: str) -> None: ...
+    def stats(self) -> Dict[str, int]: ...
+    def results(self) -> Iterator[Dict[str, Any]]: ...
+    def result_lines(self) -> Iterator[str]: ...
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    unit_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status, seq);
+CREATE TABLE IF NOT EXISTS results (
+    scene TEXT NOT NULL,
+    timestamp_us INTEGER NOT NULL,
+    unit_id TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (scene, timestamp_us)
+);
+"""
+
+# Unix seconds from SQLite's own clock (julianday has millisecond resolution)
+_DB_NOW = "SELECT (julianday('now') - 2440587.5) * 86400.0"
+
+
+class SqliteWorkQueue:
+    """
+    WorkQueue on a single SQLite file. Every state change runs in a
+    BEGIN IMMEDIATE transaction, so concurrent workers never lease the same
+    unit. Units that fail `max_attempts` times are marked failed.
+
+    shared=False: WAL mode, workers on this host only.
+    shared=True: rollback journal (journal_mode=DELETE), for a file shared
+    by several hosts over a network filesystem.
+    Lease times come from the database clock; `clock` overrides it (tests).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_attempts: int = 3,
+        clock: Optional[Callable[[], float]] = None,
+        busy_timeout_s: float = 30.0,
+        shared: bool = False,
+    ):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.shared = shared
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=busy_timeout_s, isolation_level=None)
+        want = "delete" if shared else "wal"
+        mode = self._db.execute(f"PRAGMA journal_mode={want}").fetchone()[0]
+        if mode.lower() != want:
+            self._db.close()
+            raise RuntimeError(
+                f"{self.path}: could not switch journal_mode to {want} (still {mode}); "
+                "stop the workers that have it open and retry"
+            )
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "SqliteWorkQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _tx(self) -> "_Transaction":
+        return _Transaction(self._db)
+
+    def _now(self, db: sqlite3.Connection) -> float:
+        return self.clock() if self.clock is not None else db.execute(_DB_NOW).fetchone()[0]
+
+    def enqueue(self, kind: str, units: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Add units; ids already in the queue are left untouched. Returns the number added."""
+        with self._tx() as db:
+            seq = db.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM units").fetchone()[0]
+            added = 0
+            for unit_id, payload in units:
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO units (unit_id, seq, kind, payload) VALUES (?, ?, ?, ?)",
+                    (unit_id, seq, kind, json.dumps(payload, ensure_ascii=False)),
+                )
+                if cur.rowcount:
+                    added += 1
+                    seq += 1
+            return added
+
+    def lease(self, worker_id: str, lease_s: float) -> Optional[Lease]:
+        """Next pending unit, or a leased one whose lease expired; None when nothing is available."""
+        with self._tx() as db:
+            now = self._now(db)
+            while True:
+                row = db.execute(
+                    "SELECT unit_id, kind, payload, attempts FROM units "
+                    "WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY seq LIMIT 1",
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                unit_id, kind, payload, attempts = row
+                if attempts < self.max_attempts:
+                    break
+                # lease expired on its last attempt
+                db.execute(
+                    "UPDATE units SET status = ?, lease_token = NULL, last_error = COALESCE(last_error, ?) "
+                    "WHERE unit_id = ?",
+                    (FAILED, "lease expired", unit_id),
+                )
+            token = uuid.uuid4().hex
+            db.execute(
+                "UPDATE units SET status = ?, attempts = attempts + 1, lease_token = ?, lease_owner = ?, "
+                "lease_expires = ? WHERE unit_id = ?",
+                (LEASED, token, worker_id, now + lease_s, unit_id),
+            )
+        return Lease(unit_id, kind, json.loads(payload), attempts + 1, token)
+
+    def renew(self, lease: Lease, lease_s: float) -> bool:
+        """Extend a lease still held by this token (heartbeat)."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE units SET lease_expires = ? WHERE unit_id = ? AND lease_token = ? AND status = ?",
+                (self._now(db) + lease_s, lease.unit_id, lease.token, LEASED),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, lease: Lease, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store result records and mark the unit done. Returns the rows added.
+        Raises LeaseLost (and stores nothing) when `lease` no longer holds the unit.
+        """
+        rows = [
+            (r["scene"], r["timestamp_us"], lease.unit_id, json.dumps(r, ensure_ascii=False))
+            for r in records
+        ]
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE units SET status = ?, lease_token = NULL, last_error = NULL "
+                "WHERE unit_id = ? AND lease_token = ? AND status = ?",
+                (DONE, lease.unit_id, lease.token, LEASED),
+            )
+            if cur.rowcount != 1:
+                raise LeaseLost(f"{lease.unit_id}: lease {lease.token} is no longer held")  # rolls back
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO results (scene, timestamp_us, unit_id, record) VALUES (?, ?, ?, ?)", rows
+            )
+            added = db.total_changes - before
+        return added
+
+    def fail(self, lease: Lease, error: str) -> None:
+        """Release a lease after an error: back to pending, or failed after max_attempts."""
+        with self._tx() as db:
+            db.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_token = NULL, lease_expires = NULL, last_error = ? "
+                "WHERE unit_id = ? AND lease_token = ?",
+                (self.max_attempts, FAILED, PENDING, error, lease.unit_id, lease.token),
+            )
+
+    def retry_failed(self) -> int:
+        """Give failed units a fresh set of attempts."""
+        with self._tx() as db:
+            return db.execute(
+                "UPDATE units SET status = ?, attempts = 0 WHERE status = ?", (PENDING, FAILED)
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        out = {s: 0 for s in STATUSES}
+        for status, n in self._db.execute("SELECT status, COUNT(*) FROM units GROUP BY status"):
+            out[status] = n
+        out["results"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return out
+
+    def failures(self) -> Iterator[Tuple[str, int, Optional[str]]]:
+        """(unit_id, attempts, last_error) of failed units."""
+        yield from self._db.execute(
+            "SELECT unit_id, attempts, last_error FROM units WHERE status = ? ORDER BY seq", (FAILED,)
+        )
+
+    def result_lines(self) -> Iterator[str]:
+        """Stored records as JSON text, in enqueue order, then timestamp."""
+        cur = self._db.execute(
+            "SELECT r.record FROM results r JOIN units u ON u.unit_id = r.unit_id "
+            "ORDER BY u.seq, r.timestamp_us"
+        )
+        for (record,) in cur:
+            yield record
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        for line in self.result_lines():
+            yield json.loads(line)
+
+
+class _Transaction:
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._db.execute("BEGIN IMMEDIATE")
+        return self._db
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import math
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.eval.groundedness import check_prediction
+from src.state.driving_state import DrivingState
+
+Signature = Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class ExplanationCacheConfig:
+    max_signatures: int = 1024  # LRU capacity
+    variants_per_signature: int = 4  # distinct evidence values kept per signature
+    distance_bucket_m: float = 5.0
+    decel_bucket_mps2: float = 1.0
+
+
+def _bucket(v: Optional[float], size: float) -> Optional[int]:
+    return None if v is None else int(math.floor(v / size))
+
+
+def front_object_types(state: Union[Dict[str, Any], DrivingState]) -> Tuple[Tuple[str, int], ...]:
+    """Sorted (type, count) of in-front objects."""
+    if isinstance(state, DrivingState):
+        ctr = Counter(o.type for o in state.objects if o.in_front)
+    else:
+        ctr = Counter(o.get("type") for o in state.get("objects", []) if o.get("in_front"))
+    return tuple(sorted(ctr.items()))
+
+
+def state_signature(
+    action: str,
+    state_risk: Dict[str, Any],
+    state: Union[Dict[str, Any], DrivingState],
+    cfg: ExplanationCacheConfig = ExplanationCacheConfig(),
+) -> Signature:
+    """
+    Coarse key: decided action, both risk levels, bucketed closest-front distance
+    and required deceleration, and the in-front object mix.
+    """
+    return (
+        action,
+        state_risk.get("risk_level_ttc"),
+        state_risk.get("risk_level_physics"),
+        _bucket(state_risk.get("closest_front_object_m"), cfg.distance_bucket_m),
+        _bucket(state_risk.get("required_deceleration_mps2"), cfg.decel_bucket_mps2),
+        front_object_types(state),
+    )
+
+
+class ExplanationCache:
+    """
+    LRU cache of rationales keyed by state_signature().
+
+    Each entry remembers the state_risk values its rationale was generated
+    from (its evidence). A signature match alone is not enough: get() reuses
+    an entry only if check_prediction() accepts that evidence against the new
+    state's values, so a cached rationale never cites numbers the new state
+    does not have. Thread-safe.
+    """
+
+    def __init__(self, cfg: ExplanationCacheConfig = ExplanationCacheConfig()):
+        self.cfg = cfg
+        self._entries: "OrderedDict[Signature, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.rejected = 0  # signature matched, groundedness check failed
+        self.evictions = 0
+
+    def get(
+        self,
+        action: str,
+        state_risk: Dict[str, Any],
+        state: Union[Dict[str, Any], DrivingState],
+    ) -> Optional[List[str]]:
+        sig = state_signature(action, state_risk, state, self.cfg)
+        with self._lock:
+            self.lookups += 1
+            variants = self._entries.get(sig)
+            if variants is None:
+                return None
+            self._entries.move_to_end(sig)
+            for entry in variants:
+                ok, _ = check_prediction({
+                    "state_risk": state_risk,
+                    "model_output": {"action": action, "evidence": entry["evidence"]},
+                })
+                if ok:
+                    self.hits += 1
+                    return list(entry["rationale"])
+            self.rejected += 1
+            return None
+
+    def put(
+        self,
+        action: str,
+        state_risk: Dict[str, Any],
+        state: Union[Dict[str, Any], DrivingState],
+        rationale: List[str],
+    ) -> None:
+        """Store a rationale; an existing variant with identical evidence is replaced."""
+        sig = state_signature(action, state_risk, state, self.cfg)
+        entry = {"evidence": dict(state_risk), "rationale": list(rationale)}
+        with self._lock:
+            variants = self._entries.get(sig)
+            if variants is None:
+                variants = self._entries[sig] = []
+            self._entries.move_to_end(sig)
+            # same evidence => same variant: replace it instead of keeping a duplicate
+            variants[:] = [v for v in variants if v["evidence"] != entry["evidence"]]
+            variants.insert(0, entry)
+            del variants[self.cfg.variants_per_signature:]
+            while len(self._entries) > self.cfg.max_signatures:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "rejected_by_groundedness": self.rejected,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "signatures": len(self._entries),
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import functools
+import itertools
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from src.eval.policy_metrics import PolicyMetrics
+from src.reasoning.ollama import OLLAMA_URL, call_ollama
+from src.reasoning.policy_runner import Generate, generate_policy, prepare, to_policy_record
+from src.utils.jsonio import JsonlWriter
+
+
+@dataclass(frozen=True)
+class BackendConfig:
+    name: str  # label used in file names and reports
+    model: str
+    provider: str = "ollama"
+    url: str = OLLAMA_URL
+    concurrency: int = 1  # max in-flight requests for this backend
+    options: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "BackendConfig":
+        d = dict(d)
+        d.setdefault("name", d["model"])
+        return cls(**d)
+
+    def slug(self) -> str:
+        return re.sub(r"[^A-Za-z0-9._-]+", "_", self.name)
+
+
+def ollama_generate(cfg: BackendConfig) -> Generate:
+    if cfg.provider != "ollama":
+        raise ValueError(f"Unsupported provider: {cfg.provider}")
+    return functools.partial(call_ollama, model=cfg.model, url=cfg.url, options=cfg.options)
+
+
+class AgreementStats:
+    """Pairwise action agreement between models over the same states."""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.n = 0
+        self.all_final = 0
+        self.pair_final = {p: 0 for p in itertools.combinations(names, 2)}
+        self.pair_proposed = {p: 0 for p in itertools.combinations(names, 2)}
+
+    def add(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self.n += 1
+        final = {k: r["final_action"] for k, r in records.items()}
+        proposed = {k: (r.get("policy") or {}).get("proposed_action") for k, r in records.items()}
+        if len(set(final.values())) == 1:
+            self.all_final += 1
+        for a, b in self.pair_final:
+            self.pair_final[(a, b)] += final[a] == final[b]
+            self.pair_proposed[(a, b)] += proposed[a] is not None and proposed[a] == proposed[b]
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.n or 1
+        return {
+            "n": self.n,
+            "all_agree_final": self.all_final / n,
+            "pairwise_final": {f"{a}|{b}": c / n for (a, b), c in self.pair_final.items()},
+            "pairwise_proposed": {f"{a}|{b}": c / n for (a, b), c in self.pair_proposed.items()},
+        }
+
+
+def run_fanout(
+    states: Iterable[Dict[str, Any]],
+    backends: List[BackendConfig],
+    out_dir: Path,
+    make_generate: Callable[[BackendConfig], Generate] = ollama_generate,
+    max_pending_states: int = 32,
+) -> Dict[str, Any]:
+    """
+    Sends every state to all backends concurrently. Each state is prepared
+    (state_risk + prompt) once and shared; each backend has its own thread
+    pool sized by its concurrency limit. At most `max_pending_states` states are
+    in flight, and results are written in input order to
+    <out_dir>/predictions_policy_<backend>.jsonl.
+    Returns the combined report (per-model metrics + agreement).
+    """
+    names = [b.name for b in backends]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Backend names must be unique: {names}")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pools = {b.name: ThreadPoolExecutor(max_workers=max(1, b.concurrency)) for b in backends}
+    generators = {b.name: make_generate(b) for b in backends}
+    writers = {b.name: JsonlWriter(out_dir / f"predictions_policy_{b.slug()}.jsonl") for b in backends}
+    metrics = {b.name: PolicyMetrics() for b in backends}
+    agreement = AgreementStats(names)
+    backends_by_name = {b.name: b for b in backends}
+
+    def work(name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        # generate_policy mutates its item; give each backend its own shallow copy
+        return to_policy_record(
+            generate_policy(dict(item), generators[name]),
+            model_name=backends_by_name[name].model, provider=backends_by_name[name].provider,
+        )
+
+    pending: Deque[Dict[str, Future]] = deque()
+
+    def drain_one() -> None:
+        futures = pending.popleft()
+        records = {name: f.result() for name, f in futures.items()}
+        for name, rec in records.items():
+            rec["model"]["backend"] = name
+            writers[name].write(rec)
+            metrics[name].add(rec)
+        agreement.add(records)
+
+    try:
+        for state in states:
+            item = prepare(state)
+            pending.append({name: pools[name].submit(work, name, item) for name in names})
+            if len(pending) >= max_pending_states:
+                drain_one()
+        while pending:
+            drain_one()
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+        for w in writers.values():
+            w.close()
+
+    return {
+        "models": {
+            b.name: {"model": b.model, "provider": b.provider, "url": b.url, "concurrency": b.concurrency,
+                     "metrics": metrics[b.name].summary()}
+            for b in backends
+        },
+        "agreement": agreement.summary(),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    lines.append(f"{'backend':24s} {'n':>5s} {'override%':>9s} {'mean ms':>9s} {'p50':>9s} {'p90':>9s} {'p99':>9s}")
+    for name, m in report["models"].items():
+        s = m["metrics"]
+        lat = s["latency_ms"] or {}
+        cells = [f"{lat[k]:9.1f}" if k in lat else f"{'-':>9s}" for k in ("mean", "p50", "p90", "p99")]
+        ov = s["override_rate"] or 0.0
+        lines.append(f"{name:24s} {s['n']:5d} {ov * 100:8.2f}% " + " ".join(cells))
+    ag = report["agreement"]
+    lines.append("")
+    lines.append(f"All backends agree on final action: {ag['all_agree_final'] * 100:.2f}% of {ag['n']} states")
+    for pair, rate in ag["pairwise_final"].items():
+        lines.append(f"  {pair:40s} final {rate * 100:6.2f}% | proposed {ag['pairwise_proposed'][pair] * 100:6.2f}%")
+    return lines
@@ -0,0 +1,238 @@
+from __future__ import annotations
+import queue
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from src.reasoning.explanation_cache import ExplanationCache
+from src.reasoning.guardrails import apply_guardrails
+from src.reasoning.ollama import MAX_RETRIES, extract_json
+from src.reasoning.prompt import build_explanation_prompt
+
+GUARDRAIL_DETERMINED = "guardrail_determined"
+LLM_NEEDED = "llm_needed"
+EXPLANATION_ONLY = "explanation_only"
+GATES = (GUARDRAIL_DETERMINED, LLM_NEEDED, EXPLANATION_ONLY)
+
+
+@dataclass(frozen=True)
+class GatingConfig:
+    # high => brake regardless of the model (apply_guardrails)
+    determined_levels: FrozenSet[str] = frozenset({"high"})
+    # Opt-in: take a default action at these levels and only explain it later.
+    # The guardrails allow keep / slow_down / brake at low risk, so this changes
+    # decisions the model would have made (e.g. frozenset({"low"}) with "keep").
+    explain_only_levels: FrozenSet[str] = frozenset()
+    explain_only_action: str = "keep"
+    # everything else (low, medium: slow_down vs brake, unknown: missing inputs) goes to the model
+
+
+def classify(state_risk: Dict[str, Any], cfg: GatingConfig = GatingConfig()) -> Tuple[str, Optional[str]]:
+    """
+    Returns (gate, final_action). final_action is None for LLM_NEEDED.
+    Gated actions still go through apply_guardrails, so they never disagree with it.
+    """
+    level = state_risk.get("risk_level_physics", "unknown")
+    if level in cfg.determined_levels:
+        action, _, _ = apply_guardrails(state_risk, "brake")
+        return GUARDRAIL_DETERMINED, action
+    if level in cfg.explain_only_levels:
+        action, _, _ = apply_guardrails(state_risk, cfg.explain_only_action)
+        return EXPLANATION_ONLY, action
+    return LLM_NEEDED, None
+
+
+def gated_record(item: Dict[str, Any], gate: str, action: str) -> Dict[str, Any]:
+    """
+    predictions_policy_* record for a state decided without a synchronous model call.
+    policy is None (nothing was proposed); policy_metrics.is_gated() tells these apart
+    from model fallbacks.
+    """
+    return {
+        "scene": item["scene"],
+        "timestamp_us": item["timestamp_us"],
+        "state_risk": item["state_risk"],
+        "model": None,
+        "latency_ms": None,
+        "policy": None,
+        "final_action": action,
+        "override_applied": False,
+        "override_reason": None,
+        "error": None,
+        "gate": gate,
+    }
+
+
+class GateStats:
+    """LLM calls avoided and estimated latency saved, overall and per scene."""
+
+    def __init__(self):
+        self.per_scene: Dict[str, Counter] = defaultdict(Counter)
+        self.llm_latency_ms: Dict[str, float] = defaultdict(float)
+        self.llm_calls = 0
+        self.llm_latency_total_ms = 0.0
+
+    def add(self, scene: str, gate: str, latency_ms: Optional[float] = None) -> None:
+        self.per_scene[scene][gate] += 1
+        if gate == LLM_NEEDED and latency_ms is not None:
+            self.llm_calls += 1
+            self.llm_latency_total_ms += latency_ms
+            self.llm_latency_ms[scene] += latency_ms
+
+    def mean_llm_latency_ms(self) -> Optional[float]:
+        return self.llm_latency_total_ms / self.llm_calls if self.llm_calls else None
+
+    def summary(self, assumed_latency_ms: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Saved latency = avoided calls x mean synchronous LLM latency of this run
+        (or `assumed_latency_ms` when no call was timed).
+        """
+        per_call = self.mean_llm_latency_ms() or assumed_latency_ms
+        totals: Counter = Counter()
+        scenes = {}
+        for scene, ctr in self.per_scene.items():
+            totals.update(ctr)
+            n = sum(ctr.values())
+            avoided = n - ctr[LLM_NEEDED]
+            scenes[scene] = {
+                "n": n,
+                **{g: ctr[g] for g in GATES},
+                "avoided_fraction": avoided / n if n else 0.0,
+                "saved_ms": None if per_call is None else avoided * per_call,
+            }
+        n = sum(totals.values())
+        avoided = n - totals[LLM_NEEDED]
+        return {
+            "n": n,
+            **{g: totals[g] for g in GATES},
+            "avoided_fraction": avoided / n if n else 0.0,
+            "mean_llm_latency_ms": per_call,
+            "saved_ms": None if per_call is None else avoided * per_call,
+            "scenes": scenes,
+        }
+
+
+class BackgroundExplainer:
+    """
+    Low-priority worker that generates rationales for gated states.
+    It only starts a model call while the synchronous path is idle
+    (see busy()), so explanations never delay LLM-needed states.
+    With a `cache`, rationales of equivalent states are reused without a call.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Tuple[dict, float]],
+        on_result: Callable[[Dict[str, Any]], None],
+        max_queue: int = 0,
+        max_retries: int = MAX_RETRIES,
+        cache: Optional[ExplanationCache] = None,
+    ):
+        self.generate = generate
+        self.on_result = on_result
+        self.max_retries = max_retries
+        self.cache = cache
+        self._q: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._idle = threading.Event()
+        self._idle.set()
+        self.dropped = 0
+        self.done = 0
+        self._thread = threading.Thread(target=self._run, name="background-explainer", daemon=True)
+        self._thread.start()
+
+    def submit(self, llm_state: Dict[str, Any], record: Dict[str, Any]) -> bool:
+        try:
+            self._q.put_nowait({"llm_state": llm_state, "record": record})
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def busy(self) -> "_Busy":
+        """Context manager wrapped around synchronous model calls."""
+        return _Busy(self._idle)
+
+    def pending(self) -> int:
+        return self._q.qsize()
+
+    def close(self, wait: bool = True) -> None:
+        if not wait:
+            # discard what is still queued
+            while True:
+                try:
+                    self._q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+        self._idle.set()
+        self._q.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            job = self._q.get()
+            if job is None:
+                return
+            result = self._from_cache(job)
+            if result is None:
+                self._idle.wait()
+                result = self._explain(job)
+            self.on_result(result)
+            self.done += 1
+
+    def _from_cache(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        rec = job["record"]
+        rationale = self.cache.get(rec["final_action"], rec["state_risk"], job["llm_state"])
+        if rationale is None:
+            return None
+        return {
+            "scene": rec["scene"],
+            "timestamp_us": rec["timestamp_us"],
+            "gate": rec.get("gate"),
+            "final_action": rec["final_action"],
+            "rationale": rationale,
+            "latency_ms": None,
+            "error": None,
+            "cached": True,
+        }
+
+    def _explain(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        rec = job["record"]
+        prompt = build_explanation_prompt(job["llm_state"], rec["final_action"])
+        last_err = None
+        latency_s = None
+        parsed = None
+        for _ in range(self.max_retries):
+            try:
+                resp, latency_s = self.generate(prompt)
+                parsed = extract_json(resp.get("response", ""))
+                break
+            except Exception as e:
+                last_err = str(e)
+        rationale = None if not isinstance(parsed, dict) else parsed.get("rationale", [])
+        if self.cache is not None and rationale:
+            self.cache.put(rec["final_action"], rec["state_risk"], job["llm_state"], rationale)
+        return {
+            "scene": rec["scene"],
+            "timestamp_us": rec["timestamp_us"],
+            "gate": rec.get("gate"),
+            "final_action": rec["final_action"],
+            "rationale": rationale,
+            "latency_ms": None if latency_s is None else round(latency_s * 1000, 2),
+            "error": None if parsed is not None else last_err,
+            "cached": False,
+        }
+
+
+class _Busy:
+    def __init__(self, idle: threading.Event):
+        self._idle = idle
+
+    def __enter__(self) -> None:
+        self._idle.clear()
+
+    def __exit__(self, *exc) -> None:
+        self._idle.set()
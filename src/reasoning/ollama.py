@@ -0,0 +1,53 @@
+from __future__ import annotations
+import json
+import re
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple, Union
+
+OLLAMA_URL = "http://localhost:11434/api/generate"
+MODEL = "qwen2.5:7b"
+
+MAX_RETRIES = 3
+TIMEOUT_S = 120
+
+
+def extract_json(text: str):
+    """
+    Best-effort JSON extraction:
+    - Try direct parse
+    - If extra text exists, extract first {...} block
+    """
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except Exception:
+        m = re.search(r"\{.*\}", text, flags=re.DOTALL)
+        if not m:
+            raise ValueError("No JSON object found.")
+        return json.loads(m.group(0))
+
+
+def call_ollama(
+    prompt: str,
+    model: str = MODEL,
+    url: str = OLLAMA_URL,
+    timeout_s: float = TIMEOUT_S,
+    options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+) -> Tuple[dict, float]:
+    """format: "json" or a JSON schema; Ollama then constrains decoding to it."""
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False,
+        "options": {"temperature": 0.2} if options is None else options,
+    }
+    if format is not None:
+        payload["format"] = format
+    import requests  # deferred: only code paths that talk to Ollama pay for it
+
+    t0 = perf_counter()
+    r = requests.post(url, json=payload, timeout=timeout_s)
+    dt = perf_counter() - t0
+    r.raise_for_status()
+    return r.json(), dt
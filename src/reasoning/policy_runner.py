@@ -0,0 +1,186 @@
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.reasoning.guardrails import apply_guardrails
+from src.reasoning.ollama import MAX_RETRIES, MODEL, extract_json
+from src.reasoning.prompt import build_policy_prompt, build_policy_prompt_json
+from src.state.driving_state import DrivingState
+
+# generate(prompt) -> (raw backend response, latency_s); call_ollama fits this shape
+Generate = Callable[[str], Tuple[dict, float]]
+
+
+def state_for_llm(state: Union[Dict[str, Any], DrivingState]) -> Dict[str, Any]:
+    """Minimal state exposed to the LLM (structured)."""
+    if isinstance(state, DrivingState):
+        return state.llm_dict()
+    return {
+        "scene": state["scene"],
+        "timestamp_us": state["timestamp_us"],
+        "ego": state.get("ego", {}),
+        "objects": state.get("objects", []),
+        "risk": state.get("risk", {}),
+        "risk_physics": state.get("risk_physics", {}),
+    }
+
+
+def state_risk(state: Union[Dict[str, Any], DrivingState]) -> Dict[str, Any]:
+    """Risk fields used by guardrails and copied into every prediction record."""
+    if isinstance(state, DrivingState):
+        return dict(state.state_risk())
+    risk = state.get("risk", {})
+    rp = state.get("risk_physics", {})
+    return {
+        "risk_level_ttc": risk.get("level"),
+        "min_ttc_s": risk.get("min_ttc_s"),
+        "risk_level_physics": rp.get("level"),
+        "closest_front_object_m": rp.get("closest_front_object_m"),
+        "required_deceleration_mps2": rp.get("required_deceleration_mps2"),
+    }
+
+
+def prepare(state: Union[Dict[str, Any], DrivingState]) -> Dict[str, Any]:
+    """Stage 1: state -> work item carrying the prompt and guardrail inputs."""
+    if isinstance(state, DrivingState):
+        # encoded from the compact state directly; no per-state dict copy
+        return {
+            "scene": state.scene,
+            "timestamp_us": state.timestamp_us,
+            "state_risk": state_risk(state),
+            "prompt": build_policy_prompt_json(state.llm_json()),
+        }
+    llm_state = state_for_llm(state)
+    return {
+        "scene": llm_state["scene"],
+        "timestamp_us": llm_state["timestamp_us"],
+        "state_risk": state_risk(state),
+        "prompt": build_policy_prompt(llm_state),
+    }
+
+
+def generate_policy(
+    item: Dict[str, Any],
+    generate: Generate,
+    max_retries: int = MAX_RETRIES,
+    validate: Optional[Callable[[Any], List[str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Stage 2: call the model (with retries) and parse its JSON answer.
+    With `validate` (e.g. structured.validate_policy) an answer that parses but
+    violates the schema is retried like a parse failure.
+    """
+    last_err = None
+    latency_s = None
+    parsed = None
+    raw = None
+    attempts = 0
+    failures: Counter = Counter()
+    retry_latency_s = 0.0  # model time spent on answers we threw away
+
+    for _ in range(max_retries):
+        attempts += 1
+        try:
+            resp, latency_s = generate(item["prompt"])
+            raw = resp.get("response", "")
+        except Exception as e:
+            last_err = str(e)
+            failures["request"] += 1
+            continue
+        try:
+            candidate = extract_json(raw)
+        except Exception as e:
+            last_err = str(e)
+            failures["parse"] += 1
+            retry_latency_s += latency_s or 0.0
+            continue
+        errors = validate(candidate) if validate is not None else []
+        if errors:
+            last_err = "; ".join(errors)
+            failures["validation"] += 1
+            retry_latency_s += latency_s or 0.0
+            continue
+        parsed = candidate
+        break
+
+    item.update({
+        "parsed": parsed,
+        "latency_s": latency_s,
+        "raw": raw,
+        "error": last_err,
+        "attempts": attempts,
+        "failures": dict(failures),
+        "retry_latency_s": retry_latency_s,
+    })
+    return item
+
+
+def _attempt_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    if "attempts" not in item:
+        return {}
+    return {
+        "attempts": item["attempts"],
+        "failures": item["failures"],
+        "retry_latency_ms": round(item["retry_latency_s"] * 1000, 2),
+    }
+
+
+def to_policy_record(item: Dict[str, Any], model_name: str = MODEL, provider: str = "ollama") -> Dict[str, Any]:
+    """
+    Stage 3: guardrails + the predictions_policy_* record layout.
+    `provider` names the backend that answered ("ollama", "stub", "fake").
+    """
+    parsed: Optional[dict] = item["parsed"]
+    latency_s = item["latency_s"]
+    latency_ms = None if latency_s is None else round(latency_s * 1000, 2)
+
+    if parsed is None:
+        return {
+            "scene": item["scene"],
+            "timestamp_us": item["timestamp_us"],
+            "state_risk": item["state_risk"],
+            "model": {"provider": provider, "name": model_name},
+            "latency_ms": latency_ms,
+            "policy": None,
+            "final_action": "slow_down",
+            "override_applied": True,
+            "override_reason": "Model failure; fallback slow_down",
+            "error": item["error"],
+            **_attempt_fields(item),
+        }
+
+    proposed = parsed.get("proposed_action")
+    final_action, override, reason = apply_guardrails(item["state_risk"], proposed)
+    raw = item["raw"]
+
+    return {
+        "scene": item["scene"],
+        "timestamp_us": item["timestamp_us"],
+        "state_risk": item["state_risk"],
+        "model": {"provider": provider, "name": model_name},
+        "latency_ms": latency_ms,
+        "policy": {
+            "proposed_action": proposed,
+            "rationale": parsed.get("rationale", []),
+            "confidence": parsed.get("confidence", None),
+        },
+        "final_action": final_action,
+        "override_applied": override,
+        "override_reason": reason if override else None,
+        "raw_response_preview": None if raw is None else raw[:300],
+        "error": None,
+        **_attempt_fields(item),
+    }
+
+
+def run_policy(
+    state: Dict[str, Any],
+    generate: Generate,
+    model_name: str = MODEL,
+    max_retries: int = MAX_RETRIES,
+    validate: Optional[Callable[[Any], List[str]]] = None,
+    provider: str = "ollama",
+) -> Dict[str, Any]:
+    """All three stages for one state."""
+    item = generate_policy(prepare(state), generate, max_retries=max_retries, validate=validate)
+    return to_policy_record(item, model_name=model_name, provider=provider)
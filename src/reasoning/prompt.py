@@ -8,17 +8,27 @@ ALLOWED_ACTIONS = [
     "lane_change_right"
 ]
 
-def build_policy_prompt(state: dict) -> str:
-    schema = {
-        "proposed_action": f"One of {ALLOWED_ACTIONS}",
-        "rationale": [
-            "Short bullets grounded in the input state",
-            "No invented numbers or objects"
-        ],
-        "confidence": "float 0..1"
-    }
-
-    rules = f"""
+POLICY_SCHEMA = {
+    "proposed_action": f"One of {ALLOWED_ACTIONS}",
+    "rationale": [
+        "Short bullets grounded in the input state",
+        "No invented numbers or objects"
+    ],
+    "confidence": "float 0..1"
+}
+
+# JSON Schema of the same answer, for constrained decoding (Ollama `format`)
+POLICY_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "proposed_action": {"type": "string", "enum": ALLOWED_ACTIONS},
+        "rationale": {"type": "array", "items": {"type": "string"}},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    },
+    "required": list(POLICY_SCHEMA),
+}
+
+RULES = f"""
         Rules (STRICT):
         - Decide a proposed_action based ONLY on the given state.
         - Do NOT invent numbers, objects, or signals not present.
@@ -33,22 +43,99 @@ def build_policy_prompt(state: dict) -> str:
         - Only use brake when strong deceleration is required.
 
         """.strip()
-    
-    decision_objective = """
+
+DECISION_OBJECTIVE = """
         Decision objective:
         - Maintain safety (highest priority).
         - Avoid unnecessary braking in low-risk situations.
         - Prefer smooth driving (slow_down over brake when sufficient).
         - Only use brake when strong deceleration is required.
-        """.strip() 
-    
-    return f"""{rules}
+        """.strip()
 
-        {decision_objective}
+# Everything except the state is static: encode it once at import time.
+# The state keeps stdlib formatting so prompts stay byte-identical to earlier runs.
+_PROMPT_HEAD = f"""{RULES}
+
+        {DECISION_OBJECTIVE}
 
         Driving state:
-        {json.dumps(state, ensure_ascii=False)}
+        """
+_PROMPT_TAIL = f"""
 
         Return JSON with this schema:
-        {json.dumps(schema, ensure_ascii=False)}
-        """.strip()
\ No newline at end of file
+        {json.dumps(POLICY_SCHEMA, ensure_ascii=False)}"""
+
+
+def build_policy_prompt(state: dict) -> str:
+    return build_policy_prompt_json(json.dumps(state, ensure_ascii=False))
+
+
+def build_policy_prompt_json(state_json: str) -> str:
+    """Same prompt from an already encoded state (e.g. DrivingState.llm_json())."""
+    return _PROMPT_HEAD + state_json + _PROMPT_TAIL
+
+
+EXPLANATION_SCHEMA = {
+    "rationale": [
+        "Short bullets grounded in the input state",
+        "No invented numbers or objects"
+    ]
+}
+
+_EXPLAIN_HEAD = """
+        Rules (STRICT):
+        - The action below was already decided by the safety layer; do NOT propose another one.
+        - Explain the action based ONLY on the given state.
+        - Do NOT invent numbers, objects, or signals not present.
+        - Output MUST be valid JSON only (no markdown, no extra text).
+
+        Decided action: """.strip()
+_EXPLAIN_TAIL = f"""
+
+        Return JSON with this schema:
+        {json.dumps(EXPLANATION_SCHEMA, ensure_ascii=False)}"""
+
+
+def build_explanation_prompt(state: dict, action: str) -> str:
+    return _EXPLAIN_HEAD + f" {action}\n\n        Driving state:\n        " + json.dumps(state, ensure_ascii=False) + _EXPLAIN_TAIL
+
+
+# Free-form reasoning (07_run_llm_reasoning_ollama): the model picks an action
+# and cites the risk fields it used; 06_eval_groundedness checks the evidence.
+REASONING_SCHEMA = {
+    "action": f"One of {ALLOWED_ACTIONS}",
+    "explanation": [
+        "Short bullets grounded in the input state",
+        "No invented numbers or objects"
+    ],
+    "evidence": {
+        "risk_level_ttc": "risk.level from the state",
+        "min_ttc_s": "risk.min_ttc_s from the state",
+        "risk_level_physics": "risk_physics.level from the state",
+        "closest_front_object_m": "risk_physics.closest_front_object_m from the state",
+        "required_deceleration_mps2": "risk_physics.required_deceleration_mps2 from the state"
+    },
+    "safety_notes": ["Short bullets"],
+    "confidence": "float 0..1"
+}
+
+_REASONING_HEAD = f"""
+        Rules (STRICT):
+        - Decide an action based ONLY on the given state.
+        - Do NOT invent numbers, objects, or signals not present.
+        - Evidence values MUST be copied exactly from the state (null if missing).
+        - Output MUST be valid JSON only (no markdown, no extra text).
+        - Allowed actions: {ALLOWED_ACTIONS}
+
+        {DECISION_OBJECTIVE}
+
+        Driving state:
+        """.strip()
+_REASONING_TAIL = f"""
+
+        Return JSON with this schema:
+        {json.dumps(REASONING_SCHEMA, ensure_ascii=False)}"""
+
+
+def build_reasoning_prompt(state: dict) -> str:
+    return _REASONING_HEAD + "\n        " + json.dumps(state, ensure_ascii=False) + _REASONING_TAIL
@@ -0,0 +1,248 @@
+from __future__ import annotations
+import heapq
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.eval.policy_metrics import percentile
+from src.reasoning.gating import classify, gated_record
+from src.reasoning.policy_runner import Generate, generate_policy, to_policy_record
+
+# Lower rank = served first
+RISK_RANK = {"high": 0, "medium": 1, "unknown": 2, "low": 3}
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    workers: int = 1  # concurrent backend requests
+    # time from submission until the explanation is useless, per physics level
+    deadline_s: Dict[str, float] = field(default_factory=lambda: {
+        "high": 1.0, "medium": 3.0, "unknown": 5.0, "low": 10.0,
+    })
+    # levels whose work may be dropped / downgraded
+    sheddable_levels: Tuple[str, ...] = ("low", "unknown")
+    # backend counts as saturated once this many requests are waiting
+    saturation_depth: int = 4
+    # newer frame of a scene makes its queued sheddable frames stale
+    drop_superseded: bool = True
+    # initial service-time estimate (refined with an EWMA of observed latencies)
+    expected_service_s: float = 8.0
+    # FIFO baseline for comparisons: ignore risk and TTC
+    fifo: bool = False
+
+
+@dataclass(order=True)
+class _Request:
+    sort_key: Tuple[Any, ...]
+    item: Dict[str, Any] = field(compare=False)
+    level: str = field(compare=False)
+    submitted: float = field(compare=False)
+    deadline: float = field(compare=False)
+    sheddable: bool = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+def priority_key(state_risk: Dict[str, Any]) -> Tuple[int, float]:
+    """(risk rank, min TTC) — high risk first, then the smallest time-to-collision."""
+    level = state_risk.get("risk_level_physics") or "unknown"
+    ttc = state_risk.get("min_ttc_s")
+    return RISK_RANK.get(level, RISK_RANK["unknown"]), math.inf if ttc is None else ttc
+
+
+class SchedulerMetrics:
+    """
+    Per physics level. A deadline miss is a request completed after its
+    deadline ("late") or dropped because its deadline had passed ("expired").
+    Superseded requests (a newer frame of the scene arrived) are dropped, not
+    missed; unserved_rate counts them too (everything not served in time).
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, Counter] = defaultdict(Counter)
+        self.latency_s: Dict[str, List[float]] = defaultdict(list)
+        self.max_depth = 0
+
+    def summary(self) -> Dict[str, Any]:
+        out = {}
+        for level in sorted(self.counts, key=lambda lv: RISK_RANK.get(lv, 9)):
+            c = self.counts[level]
+            lat = self.latency_s[level]
+            n = c["submitted"]
+            misses = c["late"] + c["expired"]
+            out[level] = {
+                "submitted": n,
+                "completed": c["completed"],
+                "late": c["late"],
+                "expired": c["expired"],
+                "superseded": c["superseded"],
+                "deadline_misses": misses,
+                "dropped": c["expired"] + c["superseded"],
+                "downgraded": c["downgraded"],
+                "miss_rate": misses / n if n else 0.0,
+                "unserved_rate": (misses + c["superseded"]) / n if n else 0.0,
+                "p50_s": percentile(lat, 50),
+                "p90_s": percentile(lat, 90),
+            }
+        return out
+
+
+class PriorityScheduler:
+    """
+    Serves prepared policy items (policy_runner.prepare) from a priority queue
+    keyed by physics risk level and TTC, with a deadline per request.
+
+    Sheddable (low-priority) work is
+    - dropped when its deadline has already passed, or a newer frame of the same scene arrived;
+    - downgraded to the gating action (no model call) when the backend is saturated
+      and the request would miss its deadline anyway.
+    on_result receives every completed or downgraded record; dropped requests produce none.
+    """
+
+    def __init__(
+        self,
+        generate: Generate,
+        on_result: Callable[[Dict[str, Any]], None],
+        cfg: SchedulerConfig = SchedulerConfig(),
+        model_name: str = "unknown",
+        provider: str = "ollama",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.generate = generate
+        self.on_result = on_result
+        self.cfg = cfg
+        self.model_name = model_name
+        self.provider = provider
+        self.clock = clock
+        self.metrics = SchedulerMetrics()
+        self._heap: List[_Request] = []
+        self._seq = itertools.count()
+        self._latest: Dict[str, _Request] = {}
+        self._service_s = cfg.expected_service_s
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"scheduler-{i}", daemon=True) for i in range(cfg.workers)
+        ]
+        for w in self._workers:
+            w.start()
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def submit(self, item: Dict[str, Any]) -> None:
+        sr = item["state_risk"]
+        level = sr.get("risk_level_physics") or "unknown"
+        now = self.clock()
+        deadline = now + self.cfg.deadline_s.get(level, self.cfg.deadline_s["unknown"])
+        seq = next(self._seq)
+        key = (seq,) if self.cfg.fifo else (*priority_key(sr), seq)
+        req = _Request(key, item, level, now, deadline, level in self.cfg.sheddable_levels)
+
+        with self._cond:
+            self.metrics.counts[level]["submitted"] += 1
+            prev = self._latest.get(item["scene"])
+            if self.cfg.drop_superseded and prev is not None and prev.sheddable and not prev.cancelled:
+                prev.cancelled = True  # removed lazily when popped
+            self._latest[item["scene"]] = req
+            heapq.heappush(self._heap, req)
+            self.metrics.max_depth = max(self.metrics.max_depth, len(self._heap))
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Finish everything still queued, then stop the workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for w in self._workers:
+            w.join()
+
+    def _next(self) -> Optional[Tuple[_Request, str]]:
+        with self._cond:
+            while True:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return None
+                req = heapq.heappop(self._heap)
+                counts = self.metrics.counts[req.level]
+                now = self.clock()
+                if req.cancelled:
+                    counts["superseded"] += 1
+                    continue
+                if req.sheddable and now > req.deadline:
+                    counts["expired"] += 1  # a deadline miss, just not a late one
+                    continue
+                saturated = len(self._heap) >= self.cfg.saturation_depth
+                if req.sheddable and saturated and now + self._service_s > req.deadline:
+                    counts["downgraded"] += 1
+                    return req, "downgrade"
+                return req, "run"
+
+    def _run(self) -> None:
+        while True:
+            nxt = self._next()
+            if nxt is None:
+                return
+            req, mode = nxt
+            if mode == "downgrade":
+                _, action = classify(req.item["state_risk"])
+                record = gated_record(req.item, "downgraded", action or "slow_down")
+            else:
+                t0 = self.clock()
+                record = to_policy_record(
+                    generate_policy(req.item, self.generate), model_name=self.model_name, provider=self.provider,
+                )
+                with self._cond:
+                    self._service_s = 0.8 * self._service_s + 0.2 * (self.clock() - t0)
+
+            done = self.clock()
+            with self._cond:
+                counts = self.metrics.counts[req.level]
+                counts["completed"] += 1
+                if done > req.deadline:
+                    counts["late"] += 1
+                self.metrics.latency_s[req.level].append(done - req.submitted)
+            record["queue_latency_ms"] = round((done - req.submitted) * 1000, 2)
+            record["deadline_missed"] = done > req.deadline
+            self.on_result(record)
+
+
+class FakeBackend:
+    """
+    Stand-in for call_ollama with configurable latency: fixed `latency_s`
+    plus uniform +/- `jitter` (fraction), and an optional failure rate.
+    Answers with the physics-first action so guardrails rarely override.
+    """
+
+    def __init__(self, latency_s: float = 8.0, jitter: float = 0.2, failure_rate: float = 0.0, seed: int = 0):
+        self.latency_s = latency_s
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, prompt: str) -> Tuple[dict, float]:
+        with self._lock:
+            self.calls += 1
+            dt = self.latency_s * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(dt)
+        if fail:
+            raise RuntimeError("FakeBackend: simulated failure")
+        physics = prompt.split('"risk_physics"', 1)[-1]
+        if '"level": "high"' in physics:
+            action = "brake"
+        elif '"level": "medium"' in physics:
+            action = "slow_down"
+        else:
+            action = "keep"
+        body = {"proposed_action": action, "rationale": ["fake backend"], "confidence": 0.5}
+        return {"response": json.dumps(body)}, dt
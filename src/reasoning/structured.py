@@ -0,0 +1,107 @@
+from __future__ import annotations
+import functools
+from typing import Any, Callable, Dict, List
+
+from src.reasoning.ollama import call_ollama
+from src.reasoning.prompt import POLICY_JSON_SCHEMA
+
+Validator = Callable[[Any], List[str]]
+
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def compile_validator(schema: Dict[str, Any], path: str = "$") -> Validator:
+    """
+    Compile the JSON Schema subset we emit (type, enum, properties, required,
+    items, minimum, maximum) into nested closures once, so validating an answer
+    is a handful of isinstance checks instead of walking the schema per call.
+    Returns validate(value) -> list of error strings (empty when valid).
+    """
+    checks: List[Validator] = []
+
+    if "type" in schema:
+        t = schema["type"]
+        is_type = _TYPES[t]
+
+        def check_type(v, t=t, is_type=is_type):
+            return [] if is_type(v) else [f"{path}: expected {t}, got {type(v).__name__}"]
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+
+        def check_enum(v):
+            try:
+                ok = v in allowed
+            except TypeError:  # unhashable
+                ok = False
+            return [] if ok else [f"{path}: {v!r} not in {sorted(allowed)}"]
+        checks.append(check_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        lo = schema.get("minimum", float("-inf"))
+        hi = schema.get("maximum", float("inf"))
+
+        def check_range(v):
+            if not _TYPES["number"](v):
+                return []  # reported by check_type
+            return [] if lo <= v <= hi else [f"{path}: {v} outside [{lo}, {hi}]"]
+        checks.append(check_range)
+
+    if "required" in schema:
+        required = tuple(schema["required"])
+
+        def check_required(v):
+            if not isinstance(v, dict):
+                return []
+            return [f"{path}: missing {k}" for k in required if k not in v]
+        checks.append(check_required)
+
+    if "properties" in schema:
+        props = {k: compile_validator(sub, f"{path}.{k}") for k, sub in schema["properties"].items()}
+
+        def check_props(v):
+            if not isinstance(v, dict):
+                return []
+            errs: List[str] = []
+            for k, validate in props.items():
+                if k in v:
+                    errs.extend(validate(v[k]))
+            return errs
+        checks.append(check_props)
+
+    if "items" in schema:
+        validate_item = compile_validator(schema["items"], f"{path}[]")
+
+        def check_items(v):
+            if not isinstance(v, list):
+                return []
+            errs: List[str] = []
+            for x in v:
+                errs.extend(validate_item(x))
+            return errs
+        checks.append(check_items)
+
+    def validate(v: Any) -> List[str]:
+        errs: List[str] = []
+        for check in checks:
+            errs.extend(check(v))
+        return errs
+
+    return validate
+
+
+validate_policy = compile_validator(POLICY_JSON_SCHEMA)
+
+
+def structured_ollama(model: str, **kwargs: Any):
+    """call_ollama with decoding constrained to POLICY_JSON_SCHEMA."""
+    return functools.partial(call_ollama, model=model, format=POLICY_JSON_SCHEMA, **kwargs)
@@ -0,0 +1,367 @@
+"""
+Compact in-memory representation of driving_states_v2 records.
+
+A v2 state as nested dicts costs ~10-15 KB of Python objects (up to 30
+object dicts with six keys each). DrivingState keeps scalars in __slots__
+dataclasses and the objects as a struct-of-arrays ObjectTable: one float64
+buffer (column-major) plus one int8 buffer per state.
+
+to_dict() reproduces the v2 record exactly (same keys, key order and values),
+so json.dumps(DrivingState.from_dict(d).to_dict()) == json.dumps(d).
+llm_json() encodes the LLM-facing subset straight from the columns, with the
+same text json.dumps gives for the dict, so prompts need no per-state copy.
+"""
+
+from __future__ import annotations
+import json
+import math
+import sys
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.jsonio import dumps, loads
+
+_NAN = float("nan")
+
+# Object type vocabulary; codes index into it. Unknown types are appended on first use.
+OBJECT_TYPES: List[str] = ["vehicle", "pedestrian", "barrier", "traffic_cone", "other"]
+_TYPE_CODE: Dict[str, int] = {t: i for i, t in enumerate(OBJECT_TYPES)}
+
+OBJECT_KEYS = ("type", "distance_m", "bearing_deg", "in_front", "rel_speed_mps", "ttc_s")
+
+# numeric columns in the float64 buffer (None stored as NaN)
+_DIST, _BEARING, _REL, _TTC = range(4)
+_N_NUM = 4
+
+
+def _type_code(t: str) -> int:
+    code = _TYPE_CODE.get(t)
+    if code is None:
+        if len(OBJECT_TYPES) >= 127:
+            raise ValueError(f"Too many object types to encode: {t}")
+        code = len(OBJECT_TYPES)
+        OBJECT_TYPES.append(sys.intern(t))
+        _TYPE_CODE[t] = code
+    return code
+
+
+def _f(v: Optional[float]) -> float:
+    return _NAN if v is None else v
+
+
+def _opt(v: float) -> Optional[float]:
+    return None if math.isnan(v) else v
+
+
+# json.dumps(..., ensure_ascii=False) spelling of strings and floats
+_json_str = json.encoder.encode_basestring
+_TYPE_JSON: Dict[int, str] = {}
+
+
+def _json_float(v: float) -> str:
+    if math.isfinite(v):
+        return float.__repr__(v)
+    return "NaN" if math.isnan(v) else ("Infinity" if v > 0 else "-Infinity")
+
+
+def _json_opt(v: float) -> str:
+    # NaN in the buffer means None
+    return "null" if math.isnan(v) else _json_float(v)
+
+
+def _json_dict(d: Dict[str, Any]) -> str:
+    return json.dumps(d, ensure_ascii=False)
+
+
+@dataclass(slots=True)
+class TrackedObject:
+    type: str
+    distance_m: float
+    bearing_deg: float
+    in_front: bool
+    rel_speed_mps: Optional[float]
+    ttc_s: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "distance_m": self.distance_m,
+            "bearing_deg": self.bearing_deg,
+            "in_front": self.in_front,
+            "rel_speed_mps": self.rel_speed_mps,
+            "ttc_s": self.ttc_s,
+        }
+
+
+class ObjectTable:
+    """
+    Struct-of-arrays container for a state's objects.
+    Numeric columns live in one column-major float64 array; type code and
+    in_front share one int8 array. column() returns zero-copy memoryviews.
+    """
+
+    __slots__ = ("n", "_num", "_cat")
+
+    def __init__(self, n: int, num: array, cat: array):
+        self.n = n
+        self._num = num
+        self._cat = cat
+
+    @classmethod
+    def from_dicts(cls, objects: List[Dict[str, Any]]) -> "ObjectTable":
+        n = len(objects)
+        num = array("d", bytes(8 * _N_NUM * n))
+        cat = array("b", bytes(2 * n))
+        for i, o in enumerate(objects):
+            if tuple(o) != OBJECT_KEYS:
+                raise ValueError(f"Unsupported object layout: {list(o)}")
+            num[_DIST * n + i] = o["distance_m"]
+            num[_BEARING * n + i] = o["bearing_deg"]
+            num[_REL * n + i] = _f(o["rel_speed_mps"])
+            num[_TTC * n + i] = _f(o["ttc_s"])
+            cat[i] = _type_code(o["type"])
+            cat[n + i] = 1 if o["in_front"] else 0
+        return cls(n, num, cat)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def column(self, name: str) -> memoryview:
+        col = {"distance_m": _DIST, "bearing_deg": _BEARING, "rel_speed_mps": _REL, "ttc_s": _TTC}.get(name)
+        if col is not None:
+            return memoryview(self._num)[col * self.n:(col + 1) * self.n]
+        if name == "type_code":
+            return memoryview(self._cat)[: self.n]
+        if name == "in_front":
+            return memoryview(self._cat)[self.n:]
+        raise KeyError(name)
+
+    def __getitem__(self, i: int) -> TrackedObject:
+        n = self.n
+        if not -n <= i < n:
+            raise IndexError(i)
+        i %= n
+        num = self._num
+        return TrackedObject(
+            type=OBJECT_TYPES[self._cat[i]],
+            distance_m=num[_DIST * n + i],
+            bearing_deg=num[_BEARING * n + i],
+            in_front=bool(self._cat[n + i]),
+            rel_speed_mps=_opt(num[_REL * n + i]),
+            ttc_s=_opt(num[_TTC * n + i]),
+        )
+
+    def __iter__(self) -> Iterator[TrackedObject]:
+        for i in range(self.n):
+            yield self[i]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [o.to_dict() for o in self]
+
+    def to_json(self) -> str:
+        """json.dumps(self.to_list()) text, encoded from the columns without building the dicts."""
+        n = self.n
+        num, cat = self._num, self._cat
+        parts = []
+        for i in range(n):
+            code = cat[i]
+            t = _TYPE_JSON.get(code)
+            if t is None:
+                t = _TYPE_JSON[code] = _json_str(OBJECT_TYPES[code])
+            parts.append(
+                f'{{"type": {t}, "distance_m": {_json_float(num[_DIST * n + i])}, '
+                f'"bearing_deg": {_json_float(num[_BEARING * n + i])}, '
+                f'"in_front": {"true" if cat[n + i] else "false"}, '
+                f'"rel_speed_mps": {_json_opt(num[_REL * n + i])}, "ttc_s": {_json_opt(num[_TTC * n + i])}}}'
+            )
+        return "[" + ", ".join(parts) + "]"
+
+    def closest_front_m(self) -> Optional[float]:
+        n = self.n
+        front = [self._num[_DIST * n + i] for i in range(n) if self._cat[n + i]]
+        return min(front) if front else None
+
+
+@dataclass(slots=True)
+class TtcRisk:
+    min_ttc_s: Optional[float]
+    level: str
+    reason: str
+    front_cone_deg: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "min_ttc_s": self.min_ttc_s,
+            "level": self.level,
+            "reason": self.reason,
+            "front_cone_deg": self.front_cone_deg,
+        }
+
+
+# Field order of compute_physics_risk's output; the "unknown" variant only has level/reason
+PHYSICS_KEYS = (
+    "closest_front_object_m", "ego_speed_mps", "reaction_time_s", "reaction_distance_m",
+    "braking_distance_comfort_m", "braking_distance_hard_m", "stopping_distance_comfort_m",
+    "stopping_distance_hard_m", "collision_margin_hard_m", "required_deceleration_mps2",
+    "emergency_decel_flag", "level", "reason",
+)
+_PHYSICS_UNKNOWN = ("level", "reason")
+
+
+@dataclass(slots=True)
+class PhysicsRisk:
+    level: str
+    reason: str
+    closest_front_object_m: Optional[float] = None
+    ego_speed_mps: Optional[float] = None
+    reaction_time_s: Optional[float] = None
+    reaction_distance_m: Optional[float] = None
+    braking_distance_comfort_m: Optional[float] = None
+    braking_distance_hard_m: Optional[float] = None
+    stopping_distance_comfort_m: Optional[float] = None
+    stopping_distance_hard_m: Optional[float] = None
+    collision_margin_hard_m: Optional[float] = None
+    required_deceleration_mps2: Optional[float] = None
+    emergency_decel_flag: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "PhysicsRisk":
+        if tuple(d) not in (PHYSICS_KEYS, _PHYSICS_UNKNOWN):
+            raise ValueError(f"Unsupported risk_physics layout: {list(d)}")
+        return cls(**{k: sys.intern(v) if k in ("level", "reason") else v for k, v in d.items()})
+
+    @property
+    def known(self) -> bool:
+        return self.closest_front_object_m is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.known:
+            return {"level": self.level, "reason": self.reason}
+        return {k: getattr(self, k) for k in PHYSICS_KEYS}
+
+
+STATE_KEYS = ("dataset", "version", "scene", "timestamp_us", "ego", "objects", "risk", "risk_physics")
+_EGO_KEYS = ("speed_mps", "yaw_deg")
+_RISK_KEYS = ("min_ttc_s", "level", "reason", "front_cone_deg")
+
+
+@dataclass(slots=True)
+class DrivingState:
+    dataset: str
+    version: str
+    scene: str
+    timestamp_us: int
+    ego_speed_mps: Optional[float]
+    ego_yaw_deg: float
+    objects: ObjectTable
+    risk: TtcRisk
+    risk_physics: PhysicsRisk
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "DrivingState":
+        """Build from a driving_states_v2 record; raises ValueError on any other layout."""
+        if tuple(d) != STATE_KEYS or tuple(d["ego"]) != _EGO_KEYS or tuple(d["risk"]) != _RISK_KEYS:
+            raise ValueError(f"Not a driving_states_v2 record: {list(d)}")
+        ego, risk = d["ego"], d["risk"]
+        return cls(
+            dataset=sys.intern(d["dataset"]),
+            version=sys.intern(d["version"]),
+            scene=sys.intern(d["scene"]),
+            timestamp_us=d["timestamp_us"],
+            ego_speed_mps=ego["speed_mps"],
+            ego_yaw_deg=ego["yaw_deg"],
+            objects=ObjectTable.from_dicts(d["objects"]),
+            risk=TtcRisk(
+                min_ttc_s=risk["min_ttc_s"],
+                level=sys.intern(risk["level"]),
+                reason=sys.intern(risk["reason"]),
+                front_cone_deg=risk["front_cone_deg"],
+            ),
+            risk_physics=PhysicsRisk.from_dict(d["risk_physics"]),
+        )
+
+    @classmethod
+    def from_json(cls, line: Any) -> "DrivingState":
+        return cls.from_dict(loads(line))
+
+    def ego_dict(self) -> Dict[str, Any]:
+        return {"speed_mps": self.ego_speed_mps, "yaw_deg": self.ego_yaw_deg}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dataset": self.dataset,
+            "version": self.version,
+            "scene": self.scene,
+            "timestamp_us": self.timestamp_us,
+            "ego": self.ego_dict(),
+            "objects": self.objects.to_list(),
+            "risk": self.risk.to_dict(),
+            "risk_physics": self.risk_physics.to_dict(),
+        }
+
+    def to_json(self) -> str:
+        return dumps(self.to_dict())
+
+    def llm_dict(self) -> Dict[str, Any]:
+        """
+        The LLM-facing subset (same as policy_runner.state_for_llm) as a new
+        dict, for consumers that need one (explainer, reasoning prompt).
+        The policy prompt uses llm_json() instead.
+        """
+        return {
+            "scene": self.scene,
+            "timestamp_us": self.timestamp_us,
+            "ego": self.ego_dict(),
+            "objects": self.objects.to_list(),
+            "risk": self.risk.to_dict(),
+            "risk_physics": self.risk_physics.to_dict(),
+        }
+
+    def llm_json(self) -> str:
+        """json.dumps(self.llm_dict(), ensure_ascii=False), without materializing the objects."""
+        return (
+            f'{{"scene": {_json_str(self.scene)}, "timestamp_us": {int(self.timestamp_us)}, '
+            f'"ego": {_json_dict(self.ego_dict())}, "objects": {self.objects.to_json()}, '
+            f'"risk": {_json_dict(self.risk.to_dict())}, "risk_physics": {_json_dict(self.risk_physics.to_dict())}}}'
+        )
+
+    def state_risk(self) -> "StateRiskView":
+        return StateRiskView(self)
+
+
+STATE_RISK_KEYS = (
+    "risk_level_ttc", "min_ttc_s", "risk_level_physics", "closest_front_object_m", "required_deceleration_mps2",
+)
+
+
+class StateRiskView(Mapping):
+    """
+    Read-only, zero-copy state_risk mapping over a DrivingState.
+    Works wherever a state_risk dict is read (apply_guardrails, check_prediction);
+    dict(view) gives the plain dict written to prediction records.
+    """
+
+    __slots__ = ("_s",)
+
+    def __init__(self, state: DrivingState):
+        self._s = state
+
+    def __getitem__(self, key: str) -> Any:
+        s = self._s
+        if key == "risk_level_ttc":
+            return s.risk.level
+        if key == "min_ttc_s":
+            return s.risk.min_ttc_s
+        if key == "risk_level_physics":
+            return s.risk_physics.level
+        if key in ("closest_front_object_m", "required_deceleration_mps2"):
+            return getattr(s.risk_physics, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(STATE_RISK_KEYS)
+
+    def __len__(self) -> int:
+        return len(STATE_RISK_KEYS)
@@ -0,0 +1,246 @@
+"""
+Synthetic dataset in nuScenes table format, for exporter regression runs.
+
+write_fixture() writes the 13 JSON tables of a nuScenes version (plus a 1x1
+map mask) that the devkit's NuScenes() loads. Scenes are deterministic for a
+given seed and cover the exporter edge cases: objects beyond MAX_DIST and on
+the front-cone boundary, closing / receding / static objects, a stopped ego,
+a sharp turn, every category family v1 and v2 map differently, and more
+than 30 objects in range.
+
+TableNuScenes reads the same tables without the devkit and adds the
+denormalised fields the exporters use (sample["data"], sample["anns"],
+sample_annotation["category_name"]).
+"""
+
+from __future__ import annotations
+import json
+import math
+import random
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+FIXTURE_VERSION = "v1.0-fixture"
+
+TABLES = (
+    "category", "attribute", "visibility", "instance", "sensor", "calibrated_sensor",
+    "ego_pose", "log", "scene", "sample", "sample_data", "sample_annotation", "map",
+)
+
+# One of each family the exporters distinguish (v1 maps animal / human.* separately)
+CATEGORIES = (
+    "vehicle.car", "vehicle.truck", "vehicle.bicycle", "human.pedestrian.adult",
+    "human.pedestrian.child", "human.pedestrian.police_officer", "movable_object.trafficcone",
+    "movable_object.barrier", "movable_object.debris", "animal", "static_object.bicycle_rack",
+)
+CHANNELS = (("CAM_FRONT", "camera"), ("LIDAR_TOP", "lidar"))
+KEYFRAME_INTERVAL_US = 500_000
+
+
+def _png_1x1() -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0)  # 1x1, 8-bit grayscale
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"\x00\xff")) + chunk(b"IEND", b"")
+
+
+def _quat_from_yaw(yaw: float) -> List[float]:
+    # [w, x, y, z], rotation about z
+    return [math.cos(yaw / 2), 0.0, 0.0, math.sin(yaw / 2)]
+
+
+class _Tokens:
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+
+    def __call__(self) -> str:
+        return "%032x" % self._rng.getrandbits(128)
+
+
+def build_tables(
+    n_scenes: int = 3,
+    samples_per_scene: int = 10,
+    objects_per_scene: int = 42,
+    seed: int = 0,
+) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    token = _Tokens(rng)
+    t: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLES}
+
+    cat_tokens = {}
+    for name in CATEGORIES:
+        cat_tokens[name] = token()
+        t["category"].append({"token": cat_tokens[name], "name": name, "description": ""})
+    t["attribute"].append({"token": token(), "name": "vehicle.moving", "description": ""})
+    vis_token = token()
+    t["visibility"].append({"token": vis_token, "level": "v80-100", "description": ""})
+
+    cs_tokens = {}
+    for channel, modality in CHANNELS:
+        sensor_token = token()
+        t["sensor"].append({"token": sensor_token, "channel": channel, "modality": modality})
+        cs_tokens[channel] = token()
+        t["calibrated_sensor"].append({
+            "token": cs_tokens[channel], "sensor_token": sensor_token,
+            "translation": [0.0, 0.0, 1.5], "rotation": [1.0, 0.0, 0.0, 0.0], "camera_intrinsic": [],
+        })
+
+    map_token = token()
+    t["map"].append({"token": map_token, "log_tokens": [], "category": "semantic_prior",
+                     "filename": "maps/fixture.png"})
+
+    ts = 1_532_402_900_000_000
+    for s in range(n_scenes):
+        log_token = token()
+        t["log"].append({"token": log_token, "logfile": f"fixture-log-{s}", "vehicle": "fixture",
+                         "date_captured": "2018-07-24", "location": "fixture"})
+        t["map"][0]["log_tokens"].append(log_token)
+
+        # ego path: x/y start, heading and per-keyframe speed + turn rate
+        x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        yaw = rng.uniform(-math.pi, math.pi)
+        profile = [
+            (0.0 if s == 0 and k in (3, 4) else rng.uniform(2.0, 14.0),  # scene 0 stops for two frames
+             (0.6 if s == 1 and k == 5 else rng.uniform(-0.05, 0.05)))  # scene 1 turns sharply once
+            for k in range(samples_per_scene)
+        ]
+        poses = []
+        for k in range(samples_per_scene):
+            speed, turn = profile[k]
+            if k:
+                yaw += turn
+                x += math.cos(yaw) * speed * KEYFRAME_INTERVAL_US / 1e6
+                y += math.sin(yaw) * speed * KEYFRAME_INTERVAL_US / 1e6
+            poses.append((ts + k * KEYFRAME_INTERVAL_US, x, y, yaw))
+
+        # objects: world positions placed relative to the first pose, some moving
+        _, x0, y0, yaw0 = poses[0]
+        objects = []
+        for i in range(objects_per_scene):
+            kind = i % 6
+            if kind == 0:  # straight ahead, inside the front cone
+                dist, bearing = rng.uniform(8, 45), rng.uniform(-20, 20)
+            elif kind == 1:  # around the +/-35 deg cone edge
+                dist, bearing = rng.uniform(5, 40), rng.choice([-1, 1]) * rng.uniform(33, 37)
+            elif kind == 2:  # near the 60 m cut-off
+                dist, bearing = rng.uniform(56, 66), rng.uniform(-180, 180)
+            elif kind == 3:  # far away, always filtered
+                dist, bearing = rng.uniform(80, 150), rng.uniform(-180, 180)
+            else:
+                dist, bearing = rng.uniform(1.5, 55), rng.uniform(-180, 180)
+            ang = yaw0 + math.radians(bearing)
+            vx, vy = (rng.uniform(-4, 4), rng.uniform(-4, 4)) if i % 3 == 0 else (0.0, 0.0)
+            objects.append({
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "xy": (x0 + dist * math.cos(ang), y0 + dist * math.sin(ang)),
+                "v": (vx, vy),
+                "instance": token(),
+                "anns": [],
+            })
+
+        scene_token = token()
+        sample_tokens = [token() for _ in poses]
+        sd_prev = {channel: "" for channel, _ in CHANNELS}
+        for k, (stamp, ex, ey, eyaw) in enumerate(poses):
+            t["sample"].append({
+                "token": sample_tokens[k], "timestamp": stamp, "scene_token": scene_token,
+                "prev": sample_tokens[k - 1] if k else "",
+                "next": sample_tokens[k + 1] if k + 1 < len(poses) else "",
+            })
+            pose_token = token()
+            t["ego_pose"].append({"token": pose_token, "timestamp": stamp,
+                                  "rotation": _quat_from_yaw(eyaw), "translation": [ex, ey, 0.0]})
+            for channel, modality in CHANNELS:
+                sd_token = token()
+                if sd_prev[channel]:
+                    t["sample_data"][-len(CHANNELS)]["next"] = sd_token
+                t["sample_data"].append({
+                    "token": sd_token, "sample_token": sample_tokens[k], "ego_pose_token": pose_token,
+                    "calibrated_sensor_token": cs_tokens[channel], "timestamp": stamp,
+                    "fileformat": "jpg" if modality == "camera" else "pcd", "is_key_frame": True,
+                    "height": 0, "width": 0, "filename": f"samples/{channel}/{sd_token}",
+                    "prev": sd_prev[channel], "next": "",
+                })
+                sd_prev[channel] = sd_token
+
+            dt = k * KEYFRAME_INTERVAL_US / 1e6
+            for o in objects:
+                ann_token = token()
+                o["anns"].append(ann_token)
+                t["sample_annotation"].append({
+                    "token": ann_token, "sample_token": sample_tokens[k], "instance_token": o["instance"],
+                    "visibility_token": vis_token, "attribute_tokens": [],
+                    "translation": [o["xy"][0] + o["v"][0] * dt, o["xy"][1] + o["v"][1] * dt, 1.0],
+                    "size": [1.9, 4.5, 1.6], "rotation": [1.0, 0.0, 0.0, 0.0],
+                    "num_lidar_pts": 10, "num_radar_pts": 0, "prev": "", "next": "",
+                })
+
+        # link annotation chains + instances
+        by_token = {a["token"]: a for a in t["sample_annotation"]}
+        for o in objects:
+            for a, b in zip(o["anns"], o["anns"][1:]):
+                by_token[a]["next"] = b
+                by_token[b]["prev"] = a
+            t["instance"].append({
+                "token": o["instance"], "category_token": cat_tokens[o["category"]],
+                "nbr_annotations": len(o["anns"]),
+                "first_annotation_token": o["anns"][0], "last_annotation_token": o["anns"][-1],
+            })
+
+        t["scene"].append({
+            "token": scene_token, "log_token": log_token, "nbr_samples": len(poses),
+            "first_sample_token": sample_tokens[0], "last_sample_token": sample_tokens[-1],
+            "name": f"fixture-{s:04d}", "description": "synthetic",
+        })
+        ts = poses[-1][0] + 20 * 1_000_000
+
+    return t
+
+
+def write_fixture(dataroot: Path, version: str = FIXTURE_VERSION, **kwargs: Any) -> Path:
+    """Writes <dataroot>/<version>/*.json and the map mask; returns the table directory."""
+    dataroot = Path(dataroot)
+    table_dir = dataroot / version
+    table_dir.mkdir(parents=True, exist_ok=True)
+    for name, rows in build_tables(**kwargs).items():
+        (table_dir / f"{name}.json").write_text(json.dumps(rows), encoding="utf-8")
+    (dataroot / "maps").mkdir(exist_ok=True)
+    (dataroot / "maps" / "fixture.png").write_bytes(_png_1x1())
+    return table_dir
+
+
+class TableNuScenes:
+    """The part of the devkit's NuScenes API the exporters use: .scene and get(table, token)."""
+
+    def __init__(self, version: str = FIXTURE_VERSION, dataroot: str = "."):
+        table_dir = Path(dataroot) / version
+        if not table_dir.exists():
+            raise FileNotFoundError(f"Database version not found: {table_dir}")
+        self.version = version
+        self.dataroot = str(dataroot)
+        for name in TABLES:
+            setattr(self, name, json.loads((table_dir / f"{name}.json").read_text(encoding="utf-8")))
+        self._index = {name: {r["token"]: r for r in getattr(self, name)} for name in TABLES}
+
+        # same denormalisation as NuScenes.__make_reverse_index__
+        for ann in self.sample_annotation:
+            inst = self.get("instance", ann["instance_token"])
+            ann["category_name"] = self.get("category", inst["category_token"])["name"]
+        for sd in self.sample_data:
+            sensor = self.get("sensor", self.get("calibrated_sensor", sd["calibrated_sensor_token"])["sensor_token"])
+            sd["sensor_modality"] = sensor["modality"]
+            sd["channel"] = sensor["channel"]
+        for sample in self.sample:
+            sample["data"] = {}
+            sample["anns"] = []
+        for sd in self.sample_data:
+            if sd["is_key_frame"]:
+                self.get("sample", sd["sample_token"])["data"][sd["channel"]] = sd["token"]
+        for ann in self.sample_annotation:
+            self.get("sample", ann["sample_token"])["anns"].append(ann["token"])
+
+    def get(self, table_name: str, token: str) -> Dict[str, Any]:
+        return self._index[table_name][token]
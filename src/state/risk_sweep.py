@@ -0,0 +1,250 @@
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.state.risk_physics import PhysicsRiskConfig
+
+# Level codes used in arrays; index into LEVELS
+LEVELS = ("unknown", "low", "medium", "high")
+UNKNOWN, LOW, MEDIUM, HIGH = range(4)
+
+# Action codes; -1 = invalid / not an allowed action
+ACTIONS = ("brake", "slow_down", "keep", "lane_change_left", "lane_change_right")
+_ACTION_CODE = {a: i for i, a in enumerate(ACTIONS)}
+BRAKE, SLOW_DOWN, KEEP, LANE_LEFT, LANE_RIGHT = range(5)
+
+CONFIG_FIELDS = tuple(f.name for f in fields(PhysicsRiskConfig))
+
+# Bumped when evaluate_config's result fields change, so cached results are recomputed
+RESULT_VERSION = 2
+
+
+@dataclass
+class SweepInputs:
+    """
+    Columnar inputs for the sweep. NaN marks a missing speed / front distance.
+    proposed holds action codes (-1 invalid) and has_proposal masks states with a model answer.
+    """
+    ego_speed_mps: np.ndarray
+    closest_front_m: np.ndarray
+    proposed: Optional[np.ndarray] = None
+    has_proposal: Optional[np.ndarray] = None
+
+    @property
+    def n(self) -> int:
+        return int(self.ego_speed_mps.shape[0])
+
+
+def closest_front_distance(state: Dict[str, Any]) -> Optional[float]:
+    # The exporter's value is authoritative (objects are truncated to the nearest 30)
+    rp = state.get("risk_physics") or {}
+    if rp.get("closest_front_object_m") is not None:
+        return rp["closest_front_object_m"]
+    front = [o["distance_m"] for o in state.get("objects", []) if o.get("in_front")]
+    return min(front) if front else None
+
+
+def inputs_from_states(
+    states: Iterable[Dict[str, Any]],
+    proposals: Optional[Dict[Tuple[str, int], Any]] = None,
+) -> SweepInputs:
+    """
+    states: driving_states_v2 records.
+    proposals: optional {(scene, timestamp_us): proposed_action} from a policy run.
+    """
+    speeds: List[float] = []
+    dists: List[float] = []
+    proposed: List[int] = []
+    has: List[bool] = []
+    for s in states:
+        v = (s.get("ego") or {}).get("speed_mps")
+        d = closest_front_distance(s)
+        speeds.append(np.nan if v is None else v)
+        dists.append(np.nan if d is None else d)
+        if proposals is not None:
+            key = (s["scene"], s["timestamp_us"])
+            has.append(key in proposals)
+            proposed.append(_ACTION_CODE.get(proposals.get(key), -1))
+
+    inputs = SweepInputs(np.asarray(speeds, dtype=float), np.asarray(dists, dtype=float))
+    if proposals is not None:
+        inputs.proposed = np.asarray(proposed, dtype=np.int8)
+        inputs.has_proposal = np.asarray(has, dtype=bool)
+    return inputs
+
+
+def physics_risk_arrays(
+    speed: np.ndarray, dist: np.ndarray, cfg: PhysicsRiskConfig
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized compute_physics_risk (same thresholds, same order).
+    Returns (int8 level codes into LEVELS, emergency_decel_flag); the flag is
+    False where the level is unknown.
+    """
+    known = ~(np.isnan(speed) | np.isnan(dist))
+    v = np.maximum(0.0, np.nan_to_num(speed))
+    d = np.maximum(cfg.min_distance_m, np.nan_to_num(dist))
+
+    reaction = v * cfg.reaction_time_s
+    stopping_hard = reaction + (v * v) / (2.0 * max(cfg.hard_decel_mps2, 1e-6))
+    remaining = np.maximum(cfg.min_distance_m, d - reaction)
+    required = (v * v) / (2.0 * remaining)
+    margin_hard = d - stopping_hard
+
+    levels = np.full(speed.shape, LOW, dtype=np.int8)
+    levels[required > cfg.comfort_decel_mps2] = MEDIUM
+    levels[(margin_hard < 0) | (required > cfg.hard_decel_mps2)] = HIGH
+    levels[~known] = UNKNOWN
+    emergency = known & (required > cfg.emergency_decel_mps2)
+    return levels, emergency
+
+
+def physics_levels(speed: np.ndarray, dist: np.ndarray, cfg: PhysicsRiskConfig) -> np.ndarray:
+    """Level codes only (see physics_risk_arrays)."""
+    return physics_risk_arrays(speed, dist, cfg)[0]
+
+
+def guardrail_overrides(levels: np.ndarray, proposed: np.ndarray) -> np.ndarray:
+    """Vectorized apply_guardrails: True where the proposed action would be overridden."""
+    lane_change = (proposed == LANE_LEFT) | (proposed == LANE_RIGHT)
+    high = levels == HIGH
+    medium = levels == MEDIUM
+    return (
+        (proposed < 0)
+        | (high & (proposed != BRAKE))
+        | (medium & ((proposed == KEEP) | lane_change))
+        | (~high & ~medium & lane_change)
+    )
+
+
+# --- Config generation ---
+
+def config_grid(base: PhysicsRiskConfig = PhysicsRiskConfig(), **axes: Sequence[float]) -> List[PhysicsRiskConfig]:
+    """Cartesian product over the given PhysicsRiskConfig fields; others keep `base` values."""
+    names = list(axes)
+    return [replace(base, **dict(zip(names, combo))) for combo in itertools.product(*(axes[n] for n in names))]
+
+
+def random_configs(
+    n: int,
+    ranges: Dict[str, Tuple[float, float]],
+    seed: int = 0,
+    base: PhysicsRiskConfig = PhysicsRiskConfig(),
+) -> List[PhysicsRiskConfig]:
+    """Uniform random sample of configs; values rounded to 3 decimals so cache keys stay stable."""
+    rng = random.Random(seed)
+    return [
+        replace(base, **{k: round(rng.uniform(lo, hi), 3) for k, (lo, hi) in ranges.items()})
+        for _ in range(n)
+    ]
+
+
+def config_hash(cfg: PhysicsRiskConfig) -> str:
+    payload = json.dumps({"result_version": RESULT_VERSION, **asdict(cfg)}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def dataset_hash(inputs: SweepInputs) -> str:
+    h = hashlib.sha256()
+    h.update(inputs.ego_speed_mps.tobytes())
+    h.update(inputs.closest_front_m.tobytes())
+    if inputs.proposed is not None:
+        h.update(inputs.proposed.tobytes())
+        h.update(inputs.has_proposal.tobytes())
+    return h.hexdigest()[:16]
+
+
+# --- Evaluation ---
+
+def evaluate_config(inputs: SweepInputs, cfg: PhysicsRiskConfig) -> Dict[str, Any]:
+    levels, emergency = physics_risk_arrays(inputs.ego_speed_mps, inputs.closest_front_m, cfg)
+    counts = np.bincount(levels, minlength=len(LEVELS))
+    result: Dict[str, Any] = {
+        "config": asdict(cfg),
+        "n": inputs.n,
+        "levels": {name: int(c) for name, c in zip(LEVELS, counts)},
+        # share of all states whose required deceleration exceeds emergency_decel_mps2
+        "emergency_rate": round(float(emergency.mean()), 4) if inputs.n else None,
+        "override_rate": None,
+    }
+    if inputs.proposed is not None and inputs.has_proposal.any():
+        ov = guardrail_overrides(levels, inputs.proposed)[inputs.has_proposal]
+        result["override_rate"] = round(float(ov.mean()), 4)
+    return result
+
+
+_WORKER_INPUTS: Optional[SweepInputs] = None
+
+
+def _init_worker(inputs: SweepInputs) -> None:
+    # Ship the arrays once per process instead of once per task
+    global _WORKER_INPUTS
+    _WORKER_INPUTS = inputs
+
+
+def _evaluate_chunk(cfgs: List[PhysicsRiskConfig]) -> List[Dict[str, Any]]:
+    return [evaluate_config(_WORKER_INPUTS, cfg) for cfg in cfgs]
+
+
+def _chunks(xs: List[Any], size: int) -> List[List[Any]]:
+    return [xs[i:i + size] for i in range(0, len(xs), size)]
+
+
+def run_sweep(
+    inputs: SweepInputs,
+    configs: Sequence[PhysicsRiskConfig],
+    cache_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every config over all states. Results are cached as
+    <cache_dir>/<dataset_hash>/<config_hash>.json and returned in `configs` order.
+    """
+    ds_hash = dataset_hash(inputs)
+    results: Dict[str, Dict[str, Any]] = {}
+    todo: List[PhysicsRiskConfig] = []
+
+    ds_dir = None if cache_dir is None else Path(cache_dir) / ds_hash
+    for cfg in configs:
+        ch = config_hash(cfg)
+        if ch in results:
+            continue
+        cached = None if ds_dir is None else ds_dir / f"{ch}.json"
+        if cached is not None and cached.exists():
+            results[ch] = json.loads(cached.read_text(encoding="utf-8"))
+            results[ch]["cached"] = True
+        else:
+            results[ch] = None
+            todo.append(cfg)
+
+    workers = workers or os.cpu_count() or 1
+    if todo:
+        if workers <= 1 or len(todo) == 1:
+            computed = [evaluate_config(inputs, cfg) for cfg in todo]
+        else:
+            chunk = max(1, len(todo) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(inputs,)) as ex:
+                computed = [r for part in ex.map(_evaluate_chunk, _chunks(todo, chunk)) for r in part]
+
+        if ds_dir is not None:
+            ds_dir.mkdir(parents=True, exist_ok=True)
+        for cfg, res in zip(todo, computed):
+            ch = config_hash(cfg)
+            res["config_hash"] = ch
+            res["dataset_hash"] = ds_hash
+            if ds_dir is not None:
+                (ds_dir / f"{ch}.json").write_text(json.dumps(res, ensure_ascii=False), encoding="utf-8")
+            res["cached"] = False
+            results[ch] = res
+
+    return [results[config_hash(cfg)] for cfg in configs]
+
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import json
+import math
+from pathlib import Path
+from typing import Any, Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib fallback keeps every script working
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+DEFAULT_BUFFER_BYTES = 1 << 20  # 1 MiB per write() call
+
+
+def _nan_to_none(obj: Any) -> Any:
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _nan_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_nan_to_none(v) for v in obj]
+    return obj
+
+
+def _std_dumps(obj: Any) -> str:
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        return json.dumps(_nan_to_none(obj), ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    UTF-8 JSON without a trailing newline: compact separators, NaN/Infinity
+    written as null. The stdlib fallback produces the same bytes as orjson,
+    so output does not depend on which one is installed (except the exponent
+    spelling of floats below 1e-4 or from 1e16 up, e.g. 1e-07 vs 1e-7).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; stdlib handles them
+    return _std_dumps(obj).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # stdlib also accepts NaN/Infinity written by json.dumps
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def iter_jsonl(path: Path) -> Iterator[Any]:
+    """Parsed records of a JSONL file, read in binary to skip text decoding."""
+    with Path(path).open("rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+class JsonlWriter:
+    """
+    Byte-level JSONL writer. Encoded lines are collected and written in
+    large chunks (default 1 MiB) instead of one write per record. The file
+    is a BufferedWriter of the same size, which retries short writes and
+    raises on failure.
+    """
+
+    def __init__(self, path: Path, buffer_bytes: int = DEFAULT_BUFFER_BYTES, append: bool = False):
+        self.path = Path(path)
+        self.buffer_bytes = buffer_bytes
+        self._f = self.path.open("ab" if append else "wb", buffering=buffer_bytes)
+        self._buf: list = []
+        self._size = 0
+        self.n = 0
+
+    def write(self, obj: Any) -> None:
+        self.write_raw(dumps_bytes(obj))
+
+    def write_raw(self, line: bytes) -> None:
+        """Append an already encoded record (no trailing newline)."""
+        self._buf.append(line)
+        self._buf.append(b"\n")
+        self._size += len(line) + 1
+        self.n += 1
+        if self._size >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buf:
+            self._f.write(b"".join(self._buf))
+            self._buf = []
+            self._size = 0
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()  # flushes the BufferedWriter; raises if the final write fails
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
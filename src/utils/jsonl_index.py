@@ -0,0 +1,186 @@
+from __future__ import annotations
+import json
+import mmap
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from src.utils.jsonio import loads
+
+Key = Tuple[str, int]
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+# Top-level keys come first in every artifact we write; a nested match would
+# need an unescaped `"scene":` inside another object, which none of them have.
+_SCENE_RE = re.compile(rb'"scene"\s*:\s*("(?:[^"\\]|\\.)*")')
+_TS_RE = re.compile(rb'"timestamp_us"\s*:\s*(-?\d+)')
+
+
+def index_path_for(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _key_from_line(line: bytes) -> Optional[Key]:
+    ms = _SCENE_RE.search(line)
+    mt = _TS_RE.search(line)
+    if ms and mt:
+        return json.loads(ms.group(1)), int(mt.group(1))
+    # Slow path: unusual formatting
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(rec, dict) and "scene" in rec and "timestamp_us" in rec:
+        return rec["scene"], int(rec["timestamp_us"])
+    return None
+
+
+def _source_stamp(path: Path) -> Dict[str, int]:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def build_index(path: Path) -> Dict[str, Any]:
+    """
+    Scan a JSONL file once and write its sidecar index (<file>.idx).
+    Sidecar layout: one JSON header line, then `offset<TAB>length<TAB>timestamp_us<TAB>scene` per record.
+    Duplicate keys keep the first occurrence.
+    """
+    path = Path(path)
+    n = skipped = dup = 0
+    seen = set()
+    idx_path = index_path_for(path)
+    # unique temp name: several processes may rebuild the same stale index at once
+    # (mkstemp would create it 0600; this keeps the usual umask permissions)
+    tmp_path = idx_path.with_name(f"{idx_path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+
+    try:
+        with path.open("rb") as fin, tmp_path.open("x", encoding="utf-8") as fout:
+            header = {"version": INDEX_VERSION, "source": path.name, **_source_stamp(path)}
+            fout.write(json.dumps(header) + "\n")
+            offset = 0
+            for line in fin:
+                length = len(line)
+                if line.strip():
+                    key = _key_from_line(line)
+                    if key is None:
+                        skipped += 1
+                    elif key in seen:
+                        dup += 1
+                    else:
+                        seen.add(key)
+                        # scene goes last so tabs in names cannot break the row
+                        fout.write(f"{offset}\t{length}\t{key[1]}\t{key[0]}\n")
+                        n += 1
+                offset += length
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, idx_path)
+    return {"path": str(path), "indexed": n, "skipped": skipped, "duplicates": dup}
+
+
+def _read_index(path: Path) -> Optional[Dict[Key, Tuple[int, int]]]:
+    idx_path = index_path_for(path)
+    if not idx_path.exists():
+        return None
+    with idx_path.open("r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        stamp = _source_stamp(path)
+        if header.get("version") != INDEX_VERSION or any(header.get(k) != v for k, v in stamp.items()):
+            return None  # stale
+        offsets: Dict[Key, Tuple[int, int]] = {}
+        for row in f:
+            off, length, ts, scene = row.rstrip("\n").split("\t", 3)
+            offsets[(scene, int(ts))] = (int(off), int(length))
+    return offsets
+
+
+class IndexedJsonl:
+    """
+    Random access to a JSONL artifact by (scene, timestamp_us).
+    The file is memory-mapped; only the key -> (offset, length) table lives in memory.
+    The sidecar index is (re)built automatically when missing or stale.
+    """
+
+    def __init__(self, path: Path, rebuild: bool = False):
+        self.path = Path(path)
+        offsets = None if rebuild else _read_index(self.path)
+        if offsets is None:
+            build_index(self.path)
+            offsets = _read_index(self.path)
+        self._offsets: Dict[Key, Tuple[int, int]] = offsets or {}
+        self._file = self.path.open("rb")
+        # mmap of an empty file is not allowed
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(self.path) else None
+
+    def __enter__(self) -> "IndexedJsonl":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._offsets
+
+    def keys(self) -> Iterator[Key]:
+        """Keys in file order (sequential reads through the mmap)."""
+        return iter(sorted(self._offsets, key=lambda k: self._offsets[k][0]))
+
+    def get_raw(self, scene: str, timestamp_us: int) -> Optional[bytes]:
+        loc = self._offsets.get((scene, timestamp_us))
+        if loc is None:
+            return None
+        off, length = loc
+        return self._mm[off:off + length]
+
+    def get(self, scene: str, timestamp_us: int) -> Optional[Dict[str, Any]]:
+        raw = self.get_raw(scene, timestamp_us)
+        return None if raw is None else loads(raw)
+
+    def __iter__(self) -> Iterator[Tuple[Key, Dict[str, Any]]]:
+        for key in self.keys():
+            yield key, self.get(*key)
+
+
+def join(
+    left: IndexedJsonl,
+    right: IndexedJsonl,
+    how: str = "inner",
+) -> Iterator[Tuple[Key, Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Stream (key, left_record, right_record) pairs. Walks `left` in file order
+    and fetches matches from `right` by offset, so neither file is loaded.
+    how="left" also yields unmatched left records with right_record=None.
+    """
+    if how not in {"inner", "left"}:
+        raise ValueError(f"Unsupported join: {how}")
+    for key in left.keys():
+        r = right.get(*key)
+        if r is None and how == "inner":
+            continue
+        yield key, left.get(*key), r
+
+
+def join_states_predictions(
+    states_path: Path,
+    predictions_path: Path,
+    how: str = "inner",
+) -> Iterator[Tuple[Key, Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """(key, prediction, state) for every prediction, in prediction file order."""
+    with IndexedJsonl(predictions_path) as preds, IndexedJsonl(states_path) as states:
+        yield from join(preds, states, how=how)